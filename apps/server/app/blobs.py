@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import zlib
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import PayloadBlob
+from .tracing import span
+
+
+def encode_payload(value: Any) -> tuple[str, dict[str, Any]]:
+    with span("serialize", "serialize"):
+        raw = json.dumps(value, separators=(",", ":")).encode()
+        digest = hashlib.sha256(raw).hexdigest()
+        truncated = len(raw) > settings.payload_max_bytes
+        if truncated:
+            stored = json.dumps(
+                {
+                    "truncated": True,
+                    "size": len(raw),
+                    "items": len(value) if isinstance(value, list) else None,
+                    "preview": raw[: settings.payload_preview_bytes].decode(errors="ignore"),
+                }
+            ).encode()
+        else:
+            stored = raw
+        return digest, {
+            "hash": digest,
+            "data": zlib.compress(stored, settings.payload_compression_level),
+            "size": len(raw),
+            "truncated": truncated,
+            "created_at": datetime.utcnow(),
+        }
+
+
+def decode_payload(blob: PayloadBlob) -> Any:
+    return json.loads(zlib.decompress(blob.data))
+
+
+def store_payloads(db: Session, rows: list[dict[str, Any]]) -> None:
+    unique = list({row["hash"]: row for row in rows}.values())
+    if not unique:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        # Reusing a blob restarts its grace period, so the orphan sweep cannot delete it
+        # between this write and the commit of the step rows that point at it.
+        statement = dialect_insert(PayloadBlob)
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=["hash"], set_={"created_at": statement.excluded.created_at}
+            ),
+            unique,
+        )
+        return
+    existing = set(
+        db.scalars(select(PayloadBlob.hash).where(PayloadBlob.hash.in_([row["hash"] for row in unique])))
+    )
+    missing = [row for row in unique if row["hash"] not in existing]
+    if missing:
+        db.execute(insert(PayloadBlob), missing)
+    if existing:
+        db.execute(update(PayloadBlob).where(PayloadBlob.hash.in_(existing)).values(created_at=datetime.utcnow()))
+
+
+def load_payloads(db: Session, hashes: set[str | None]) -> dict[str, Any]:
+    return {digest: json.loads(raw) for digest, raw in load_raw_payloads(db, hashes).items()}
+
+
+def load_raw_payloads(db: Session, hashes: set[str | None]) -> dict[str, bytes]:
+    """Return the stored JSON text of each payload, for callers that copy it out unparsed."""
+    wanted = sorted(digest for digest in hashes if digest)
+    payloads: dict[str, bytes] = {}
+    for start in range(0, len(wanted), 500):
+        chunk = wanted[start : start + 500]
+        for digest, data in db.query(PayloadBlob.hash, PayloadBlob.data).filter(PayloadBlob.hash.in_(chunk)):
+            payloads[digest] = zlib.decompress(data)
+    return payloads
@@ -3,6 +3,64 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     database_url: str = "sqlite:///./data.db"
+    metrics_enabled: bool = False
+    trace_sample_rate: float = 0.0
+    trace_max_spans: int = 2000
+    trace_otlp_file: str = ""
+    executor_mode: str = "thread"
+    executor_workers: int = 4
+    executor_queue_high_water: int = 1000
+    executor_queue: str = "memory"
+    executor_shutdown_timeout: float = 30.0
+    queue_lease_seconds: float = 60.0
+    queue_poll_interval: float = 1.0
+    queue_max_attempts: int = 3
+    scheduler_leader_election: bool = False
+    scheduler_lease_seconds: float = 30.0
+    workflow_sync_seconds: float = 5.0
+    node_concurrency: int = 8
+    stream_chunk_size: int = 1000
+    execution_stream_batch: int = 50
+    event_history_per_execution: int = 1000
+    event_retained_executions: int = 500
+    event_subscriber_buffer: int = 1000
+    event_keepalive_seconds: float = 15.0
+    workflow_max_concurrency: int = 0
+    default_overlap_policy: str = "allow"
+    cron_misfire_grace_seconds: int = 30
+    webhook_bulk_max_events: int = 10_000
+    webhook_batch_max_items: int = 500
+    webhook_batch_max_wait_ms: int = 1000
+    webhook_idempotency_header: str = "Idempotency-Key"
+    webhook_idempotency_window_seconds: float = 86_400.0
+    webhook_idempotency_max_keys: int = 100_000
+    http_max_connections_per_host: int = 20
+    http_max_keepalive_per_host: int = 10
+    http_keepalive_expiry: float = 30.0
+    http_http2: bool = False
+    http_timeout: float = 5.0
+    http_max_hosts: int = 256
+    http_cache_max_entries: int = 1024
+    http_cache_max_bytes: int = 64 * 1024 * 1024
+    http_cache_dir: str = ""
+    http_cache_default_ttl: float = 60.0
+    code_workers: int = 4
+    code_timeout: float = 2.0
+    code_worker_max_tasks: int = 500
+    code_acquire_timeout: float = 30.0
+    plan_cache_size: int = 512
+    step_persistence: str = "full"
+    step_flush_interval_ms: int = 1000
+    payload_max_bytes: int = 1_000_000
+    payload_preview_bytes: int = 2048
+    payload_compression_level: int = 6
+    retention_interval_minutes: int = 60
+    retention_max_age_days: int = 30
+    retention_max_count: int = 0
+    retention_failed_max_age_days: int = 90
+    retention_chunk_size: int = 500
+    retention_archive_dir: str = ""
+    retention_vacuum_pages: int = 1000
 
 
 settings = Settings()
@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Any
+
+from .config import settings
+from .db import SessionLocal, engine
+from .events import FINISHED_EVENT, event_bus
+from .governor import AdmissionController, AdmissionRejected, PendingRun, QueueFullError
+from .http_pool import http_pool
+from .leases import PROCESS_OWNER, ClaimedExecution, DurableQueue
+from .metrics import EXECUTIONS_TOTAL
+from .models import Execution
+from .nodes import Items
+from .plans import ExecutionPlan, plan_cache
+from .runtime import create_execution, execute_workflow
+from .sandbox import sandbox_pool
+
+logger = logging.getLogger(__name__)
+
+
+def _init_worker_process() -> None:
+    # Connections inherited through fork must not be shared with the parent.
+    engine.dispose(close=False)
+    http_pool.reset()
+    sandbox_pool.reset()
+    plan_cache.clear()
+
+
+def _run_execution(
+    plan: ExecutionPlan | None,
+    workflow_id: str,
+    updated_at: datetime | None,
+    initial_items: Items,
+    execution_id: str,
+) -> None:
+    try:
+        if plan is None:
+            # Process workers cannot receive compiled handlers; use their own cache.
+            plan = plan_cache.get(workflow_id, updated_at)
+        if plan is None:
+            raise RuntimeError("Workflow not found")
+        with SessionLocal() as db:
+            execute_workflow(db, plan, initial_items, execution_id=execution_id)
+    except LookupError as exc:
+        logger.info("Skipped execution %s: %s", execution_id, exc)
+    except Exception:  # noqa: BLE001
+        logger.exception("Execution %s failed", execution_id)
+
+
+class ExecutionDispatcher:
+    def __init__(
+        self, mode: str, workers: int, governor: AdmissionController, queue: DurableQueue | None = None
+    ) -> None:
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.governor = governor
+        self.queue = queue
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+        self._completed = 0
+        self._running: dict[Future, PendingRun] = {}
+        self._wake = threading.Event()
+        self._claimer: threading.Thread | None = None
+        self._stopping = False
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                return
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=_init_worker_process
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="execution"
+                )
+            if self.queue is not None:
+                self._stopping = False
+                self._claimer = threading.Thread(
+                    target=self._claim_loop, name="execution-claimer", daemon=True
+                )
+                self._claimer.start()
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            claimer, self._claimer = self._claimer, None
+            self._stopping = True
+        self._wake.set()
+        if claimer is not None:
+            claimer.join(timeout=5)
+        if wait:
+            self._wait_idle(settings.executor_shutdown_timeout)
+        with self._lock:
+            executor, self._executor = self._executor, None
+            unfinished = [run for future, run in self._running.items() if not future.done()]
+        leftover = self.governor.cancel_workflow(None)
+        if executor is not None:
+            executor.shutdown(wait=wait and not unfinished, cancel_futures=True)
+        if self.queue is not None:
+            # Runs claimed here but not finished go straight back to the other workers.
+            self.queue.release_all()
+            return
+        self._cancel_runs(leftover, "Server shut down before the run started")
+        self._cancel_runs(unfinished, "Server shut down before the run finished")
+
+    def submit(self, plan: ExecutionPlan, initial_items: Items, trigger: str = "manual") -> str:
+        self.start()
+        if self.queue is not None:
+            return self._submit_durable(plan, initial_items, trigger)
+        run, replaced = self.governor.reserve(plan, trigger)
+        try:
+            with SessionLocal() as db:
+                execution_id = create_execution(db, plan.workflow_id).id
+            self._cancel_runs(replaced)
+        except Exception:
+            self.governor.abandon(run)
+            raise
+        event_bus.publish("execution.queued", execution_id, plan.workflow_id, status="queued", trigger=trigger)
+        self.governor.enqueue(run, (plan, initial_items, execution_id))
+        self._pump()
+        return execution_id
+
+    def cancel_workflow(self, workflow_id: str) -> list[str]:
+        """Drop a workflow's runs that are still waiting for a worker, e.g. before it is deleted."""
+        runs = self.governor.cancel_workflow(workflow_id)
+        self._cancel_runs(runs)
+        return [run.payload[2] for run in runs]
+
+    def stats(self) -> dict[str, Any]:
+        admission = self.governor.stats()
+        stats = {
+            "mode": self.mode,
+            "workers": self.workers,
+            "depth": admission["queued"],
+            "completed": self._completed,
+            **admission,
+        }
+        if self.queue is not None:
+            with SessionLocal() as db:
+                stats["durable"] = {**self.queue.stats(), "depth": self.queue.depth(db)}
+        return stats
+
+    def _submit_durable(self, plan: ExecutionPlan, initial_items: Items, trigger: str) -> str:
+        # Admission happens when a worker claims the run, in whichever process that is.
+        with SessionLocal() as db:
+            if self.queue.depth(db) >= settings.executor_queue_high_water:
+                raise QueueFullError("Execution queue is full")
+            execution = Execution(
+                id=str(uuid.uuid4()),
+                workflow_id=plan.workflow_id,
+                status="queued",
+                started_at=datetime.utcnow(),
+            )
+            db.add(execution)
+            self.queue.push(db, execution.id, plan.workflow_id, trigger, initial_items)
+            db.commit()
+            execution_id = execution.id
+        event_bus.publish("execution.queued", execution_id, plan.workflow_id, status="queued", trigger=trigger)
+        self._wake.set()
+        return execution_id
+
+    def _wait_idle(self, timeout: float) -> None:
+        # In memory mode accepted runs exist nowhere else, so the admission queue is drained
+        # too; in durable mode queued runs are released to the other workers instead.
+        deadline = time.monotonic() + timeout
+        while True:
+            admission = self.governor.stats()
+            if not admission["running"] and (self.queue is not None or not admission["queued"]):
+                return
+            if time.monotonic() >= deadline:
+                logger.warning(
+                    "Shutting down with %s executions running and %s queued after %ss",
+                    admission["running"],
+                    admission["queued"],
+                    timeout,
+                )
+                return
+            time.sleep(0.05)
+
+    def _cancel_runs(self, runs: list[PendingRun], error: str | None = None) -> None:
+        if not runs:
+            return
+        with SessionLocal() as db:
+            db.query(Execution).filter(
+                Execution.id.in_([run.payload[2] for run in runs]), Execution.status.in_(("queued", "running"))
+            ).update(
+                {"status": "cancelled", "error": error, "finished_at": datetime.utcnow()},
+                synchronize_session=False,
+            )
+            db.commit()
+        for run in runs:
+            if self.queue is not None:
+                self.queue.complete(run.payload[2])
+            EXECUTIONS_TOTAL.inc("cancelled")
+            event_bus.publish(FINISHED_EVENT, run.payload[2], run.workflow_id, status="cancelled", error=error)
+
+    def _claim_loop(self) -> None:
+        heartbeat_every = self.queue.lease_seconds / 3
+        last_heartbeat = time.monotonic()
+        while not self._stopping:
+            self._wake.wait(settings.queue_poll_interval)
+            self._wake.clear()
+            if self._stopping:
+                return
+            try:
+                if time.monotonic() - last_heartbeat >= heartbeat_every:
+                    self.queue.heartbeat()
+                    last_heartbeat = time.monotonic()
+                admission = self.governor.stats()
+                capacity = self.workers - admission["running"] - admission["queued"]
+                for claimed in self.queue.claim(capacity):
+                    self._admit_claimed(claimed)
+            except Exception:  # noqa: BLE001
+                logger.exception("Claiming queued executions failed")
+
+    def _admit_claimed(self, claimed: ClaimedExecution) -> None:
+        plan = plan_cache.fresh(claimed.workflow_id)
+        try:
+            if plan is None:
+                raise RuntimeError("Workflow not found")
+            run, replaced = self.governor.reserve(plan, claimed.trigger)
+        except (AdmissionRejected, RuntimeError) as exc:
+            status = "cancelled" if isinstance(exc, AdmissionRejected) else "failed"
+            with SessionLocal() as db:
+                db.query(Execution).filter(Execution.id == claimed.execution_id).update(
+                    {"status": status, "error": str(exc), "finished_at": datetime.utcnow()},
+                    synchronize_session=False,
+                )
+                db.commit()
+            self.queue.complete(claimed.execution_id)
+            EXECUTIONS_TOTAL.inc(status)
+            event_bus.publish(
+                FINISHED_EVENT, claimed.execution_id, claimed.workflow_id, status=status, error=str(exc)
+            )
+            return
+        self._cancel_runs(replaced)
+        self.governor.enqueue(run, (plan, claimed.items, claimed.execution_id))
+        self._pump()
+
+    def _pump(self) -> None:
+        started: list[tuple[PendingRun, Future]] = []
+        with self._lock:
+            executor = self._executor
+            if executor is None:
+                return
+            for run in self.governor.next_runs():
+                plan, initial_items, execution_id = run.payload
+                future = executor.submit(
+                    _run_execution,
+                    None if self.mode == "process" else plan,
+                    plan.workflow_id,
+                    plan.updated_at,
+                    initial_items,
+                    execution_id,
+                )
+                started.append((run, future))
+                self._running[future] = run
+        # A run that already finished calls _on_done inline, which takes the lock and pumps again.
+        for run, future in started:
+            future.add_done_callback(partial(self._on_done, run))
+
+    def _on_done(self, run: PendingRun, future: Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("Execution worker crashed: %s", future.exception())
+        if self.mode == "process":
+            # Worker processes publish to their own bus; report the outcome from here.
+            self._publish_finished(run)
+        if self.queue is not None:
+            try:
+                self.queue.complete(run.payload[2])
+            except Exception:  # noqa: BLE001
+                logger.exception("Could not remove %s from the execution queue", run.payload[2])
+        self.governor.finished(run)
+        with self._lock:
+            self._running.pop(future, None)
+            self._completed += 1
+        self._pump()
+
+    def _publish_finished(self, run: PendingRun) -> None:
+        plan, _initial_items, execution_id = run.payload
+        try:
+            with SessionLocal() as db:
+                execution = db.query(Execution).filter(Execution.id == execution_id).first()
+        except Exception:  # noqa: BLE001
+            logger.exception("Could not load execution %s", execution_id)
+            return
+        if execution is not None:
+            event_bus.publish(
+                FINISHED_EVENT,
+                execution_id,
+                plan.workflow_id,
+                status=execution.status,
+                error=execution.error,
+                finishedAt=execution.finished_at,
+            )
+
+
+dispatcher = ExecutionDispatcher(
+    settings.executor_mode,
+    settings.executor_workers,
+    AdmissionController(
+        settings.executor_workers,
+        settings.workflow_max_concurrency,
+        settings.executor_queue_high_water,
+    ),
+    (
+        DurableQueue(PROCESS_OWNER, settings.queue_lease_seconds, settings.queue_max_attempts)
+        if settings.executor_queue == "database"
+        else None
+    ),
+)
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+
+from .config import settings
+
+FINISHED_EVENT = "execution.finished"
+
+
+@dataclass
+class ExecutionEvent:
+    id: int
+    type: str
+    execution_id: str
+    workflow_id: str
+    data: dict[str, Any]
+    at: datetime = field(default_factory=datetime.utcnow)
+
+    def to_sse(self) -> bytes:
+        payload = {
+            "type": self.type,
+            "executionId": self.execution_id,
+            "workflowId": self.workflow_id,
+            "at": self.at,
+            **self.data,
+        }
+        # jsonable_encoder writes datetimes as ISO-8601, matching the REST responses.
+        body = json.dumps(jsonable_encoder(payload), separators=(",", ":"))
+        # Snapshots built from the database have no id, so they do not move Last-Event-ID.
+        prefix = f"id: {self.id}\n" if self.id else ""
+        return f"{prefix}event: {self.type}\ndata: {body}\n\n".encode()
+
+
+@dataclass
+class _History:
+    workflow_id: str
+    events: deque[ExecutionEvent]
+    finished: bool = False
+
+
+class Subscription:
+    """A bounded queue of events for one SSE client, fed from executor threads.
+
+    A client that falls more than `limit` events behind is cut off with a final None
+    instead of growing the queue; it reconnects with Last-Event-ID and is replayed.
+    """
+
+    def __init__(
+        self, loop: asyncio.AbstractEventLoop, execution_id: str | None, workflow_id: str | None, limit: int
+    ) -> None:
+        self.loop = loop
+        self.execution_id = execution_id
+        self.workflow_id = workflow_id
+        self.limit = limit
+        self.queue: asyncio.Queue[ExecutionEvent | None] = asyncio.Queue()
+        self.overflowed = False
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+
+    def matches(self, event: ExecutionEvent) -> bool:
+        if self.execution_id is not None:
+            return event.execution_id == self.execution_id
+        return event.workflow_id == self.workflow_id
+
+    def push(self, event: ExecutionEvent) -> None:
+        # Called with the bus lock held.
+        if self.overflowed:
+            return
+        with self._pending_lock:
+            if self._pending >= self.limit:
+                self.overflowed = True
+                item: ExecutionEvent | None = None
+            else:
+                self._pending += 1
+                item = event
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, item)
+        except RuntimeError:
+            # The client's event loop has shut down.
+            self.overflowed = True
+
+    async def get(self, timeout: float) -> ExecutionEvent | None:
+        event = await asyncio.wait_for(self.queue.get(), timeout)
+        if event is not None:
+            with self._pending_lock:
+                self._pending -= 1
+        return event
+
+
+class ExecutionEventBus:
+    """In-process publish/subscribe of execution progress with a bounded replay history."""
+
+    def __init__(self, history_per_execution: int, retained_executions: int, subscriber_buffer: int) -> None:
+        self.history_per_execution = history_per_execution
+        self.retained_executions = retained_executions
+        self.subscriber_buffer = subscriber_buffer
+        self._history: OrderedDict[str, _History] = OrderedDict()
+        self._subscribers: list[Subscription] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._published = 0
+        self._overflows = 0
+
+    def publish(self, event_type: str, execution_id: str, workflow_id: str, **data: Any) -> None:
+        with self._lock:
+            event = ExecutionEvent(next(self._ids), event_type, execution_id, workflow_id, data)
+            history = self._history.get(execution_id)
+            if history is None:
+                history = self._history[execution_id] = _History(
+                    workflow_id, deque(maxlen=self.history_per_execution)
+                )
+                self._evict()
+            history.events.append(event)
+            if event_type == FINISHED_EVENT:
+                history.finished = True
+            self._published += 1
+            for subscription in self._subscribers:
+                if subscription.matches(event):
+                    overflowed = subscription.overflowed
+                    subscription.push(event)
+                    if subscription.overflowed and not overflowed:
+                        self._overflows += 1
+
+    def subscribe(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        execution_id: str | None = None,
+        workflow_id: str | None = None,
+        last_event_id: int = 0,
+    ) -> tuple[Subscription, list[ExecutionEvent]]:
+        """Register a subscriber and return the events it missed, atomically.
+
+        Execution subscribers replay that execution's history. Workflow subscribers
+        replay the active executions, or everything after last_event_id on reconnect.
+        """
+        subscription = Subscription(loop, execution_id, workflow_id, self.subscriber_buffer)
+        with self._lock:
+            if execution_id is not None:
+                history = self._history.get(execution_id)
+                replay = list(history.events) if history else []
+            else:
+                replay = sorted(
+                    (
+                        event
+                        for history in self._history.values()
+                        if history.workflow_id == workflow_id and (last_event_id or not history.finished)
+                        for event in history.events
+                    ),
+                    key=lambda event: event.id,
+                )
+            self._subscribers.append(subscription)
+        return subscription, [event for event in replay if event.id > last_event_id]
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "executions": len(self._history),
+                "published": self._published,
+                "overflows": self._overflows,
+            }
+
+    def _evict(self) -> None:
+        while len(self._history) > self.retained_executions:
+            victim = next((key for key, history in self._history.items() if history.finished), None)
+            self._history.pop(victim if victim is not None else next(iter(self._history)))
+
+
+def count_items(value: Any) -> Any:
+    """Item counts for an event: a number for item lists, per handle for handle maps."""
+    if isinstance(value, list):
+        return len(value)
+    if isinstance(value, dict):
+        if value.get("streamed"):
+            # Streamed steps keep running totals; copy them so later chunks do not change the event.
+            items = value["items"]
+            return dict(items) if isinstance(items, dict) else items
+        return {handle: len(items) for handle, items in value.items() if isinstance(items, list)}
+    return None
+
+
+event_bus = ExecutionEventBus(
+    settings.event_history_per_execution,
+    settings.event_retained_executions,
+    settings.event_subscriber_buffer,
+)
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any
+
+from .config import settings
+from .plans import ExecutionPlan
+
+logger = logging.getLogger(__name__)
+
+OVERLAP_POLICIES = ("allow", "skip", "queue", "replace")
+TRIGGER_PRIORITY = {"manual": 0, "webhook": 1, "cron": 2}
+
+
+class AdmissionRejected(RuntimeError):
+    reason = "rejected"
+
+
+class QueueFullError(AdmissionRejected):
+    reason = "queueFull"
+
+
+class OverlapRejected(AdmissionRejected):
+    reason = "overlap"
+
+
+class MisfireCoalesced(AdmissionRejected):
+    reason = "coalesced"
+
+
+@dataclass(order=True)
+class PendingRun:
+    priority: int
+    sequence: int
+    workflow_id: str = field(compare=False)
+    trigger: str = field(compare=False)
+    limit: int = field(compare=False)
+    payload: Any = field(default=None, compare=False)
+    cancelled: bool = field(default=False, compare=False)
+
+
+class AdmissionController:
+    def __init__(self, global_limit: int, workflow_limit: int, high_water: int) -> None:
+        self.global_limit = max(1, global_limit)
+        self.workflow_limit = workflow_limit
+        self.high_water = high_water
+        self._lock = threading.Lock()
+        self._heap: list[PendingRun] = []
+        self._sequence = itertools.count()
+        self._queued: dict[str, int] = {}
+        self._queued_cron: dict[str, int] = {}
+        self._running: dict[str, int] = {}
+        self._running_total = 0
+        self._pending_total = 0
+        self._admitted = 0
+        self._rejected: dict[str, int] = {}
+        self._replaced = 0
+
+    def reserve(self, plan: ExecutionPlan, trigger: str) -> tuple[PendingRun, list[PendingRun]]:
+        overlap = str(plan.settings.get("overlap") or settings.default_overlap_policy)
+        if overlap not in OVERLAP_POLICIES:
+            # Settings are validated on save, but rows written before that may hold anything.
+            logger.warning("Unknown overlap policy %r for %s, using the default", overlap, plan.workflow_id)
+            overlap = settings.default_overlap_policy
+        try:
+            limit = int(plan.settings.get("maxConcurrency") or self.workflow_limit)
+        except (TypeError, ValueError):
+            logger.warning("Invalid maxConcurrency for %s, using the default", plan.workflow_id)
+            limit = self.workflow_limit
+        if overlap in ("queue", "replace"):
+            limit = 1
+        workflow_id = plan.workflow_id
+        with self._lock:
+            if self._pending_total >= self.high_water:
+                self._reject(QueueFullError("Execution queue is full"))
+            active = self._running.get(workflow_id, 0) + self._queued.get(workflow_id, 0)
+            if overlap == "skip" and active:
+                self._reject(OverlapRejected("Workflow is already running"))
+            if trigger == "cron" and self._queued_cron.get(workflow_id):
+                self._reject(MisfireCoalesced("A cron run for this workflow is already queued"))
+            replaced: list[PendingRun] = []
+            if overlap == "replace":
+                replaced = self._cancel_queued(workflow_id)
+                self._replaced += len(replaced)
+            run = PendingRun(
+                priority=TRIGGER_PRIORITY.get(trigger, len(TRIGGER_PRIORITY)),
+                sequence=next(self._sequence),
+                workflow_id=workflow_id,
+                trigger=trigger,
+                limit=limit,
+            )
+            self._queued[workflow_id] = self._queued.get(workflow_id, 0) + 1
+            if trigger == "cron":
+                self._queued_cron[workflow_id] = self._queued_cron.get(workflow_id, 0) + 1
+            self._pending_total += 1
+            self._admitted += 1
+            return run, replaced
+
+    def enqueue(self, run: PendingRun, payload: Any) -> None:
+        with self._lock:
+            run.payload = payload
+            heapq.heappush(self._heap, run)
+
+    def cancel_workflow(self, workflow_id: str | None) -> list[PendingRun]:
+        """Cancel runs still waiting in the queue, for one workflow or (None) all of them."""
+        with self._lock:
+            return self._cancel_queued(workflow_id)
+
+    def abandon(self, run: PendingRun) -> None:
+        with self._lock:
+            self._forget(run)
+
+    def next_runs(self) -> list[PendingRun]:
+        started: list[PendingRun] = []
+        deferred: list[PendingRun] = []
+        with self._lock:
+            while self._heap and self._running_total < self.global_limit:
+                run = heapq.heappop(self._heap)
+                if run.cancelled:
+                    continue
+                if run.limit and self._running.get(run.workflow_id, 0) >= run.limit:
+                    deferred.append(run)
+                    continue
+                self._forget(run)
+                self._running[run.workflow_id] = self._running.get(run.workflow_id, 0) + 1
+                self._running_total += 1
+                started.append(run)
+            for run in deferred:
+                heapq.heappush(self._heap, run)
+        return started
+
+    def finished(self, run: PendingRun) -> None:
+        with self._lock:
+            self._running_total -= 1
+            remaining = self._running.get(run.workflow_id, 1) - 1
+            if remaining:
+                self._running[run.workflow_id] = remaining
+            else:
+                self._running.pop(run.workflow_id, None)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "globalLimit": self.global_limit,
+                "workflowLimit": self.workflow_limit,
+                "queued": self._pending_total,
+                "running": self._running_total,
+                "admitted": self._admitted,
+                "rejected": dict(self._rejected),
+                "replaced": self._replaced,
+            }
+
+    def _reject(self, error: AdmissionRejected) -> None:
+        self._rejected[error.reason] = self._rejected.get(error.reason, 0) + 1
+        raise error
+
+    def _cancel_queued(self, workflow_id: str | None) -> list[PendingRun]:
+        cancelled = []
+        for run in self._heap:
+            if workflow_id in (None, run.workflow_id) and not run.cancelled:
+                run.cancelled = True
+                self._forget(run)
+                cancelled.append(run)
+        return cancelled
+
+    def _forget(self, run: PendingRun) -> None:
+        self._pending_total -= 1
+        self._decrement(self._queued, run.workflow_id)
+        if run.trigger == "cron":
+            self._decrement(self._queued_cron, run.workflow_id)
+
+    @staticmethod
+    def _decrement(counts: dict[str, int], key: str) -> None:
+        remaining = counts.get(key, 1) - 1
+        if remaining:
+            counts[key] = remaining
+        else:
+            counts.pop(key, None)
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+CACHEABLE_METHODS = {"GET", "HEAD"}
+
+HttpResult = dict[str, Any]
+
+
+@dataclass
+class CachedResponse:
+    result: HttpResult
+    etag: str | None
+    last_modified: str | None
+    expires_at: float
+    size: int
+
+    def validators(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def cache_key(method: str, url: str, headers: dict[str, Any], query: dict[str, Any]) -> str:
+    # Hashed so credentials in headers never reach the disk tier in clear text.
+    material = json.dumps(
+        [
+            method.upper(),
+            url,
+            sorted((str(key), str(value)) for key, value in (query or {}).items()),
+            sorted((str(key).lower(), str(value)) for key, value in (headers or {}).items()),
+        ]
+    )
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+def _header(result: HttpResult, name: str) -> str | None:
+    for key, value in (result.get("headers") or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int, max_bytes: int, disk_dir: str) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._revalidated = 0
+        self._disk_hits = 0
+        self._evictions = 0
+
+    def fetch(
+        self, key: str, ttl: float, send: Callable[[dict[str, str]], HttpResult]
+    ) -> tuple[HttpResult, str]:
+        """Serve from cache while fresh, otherwise send with validators and store the result.
+
+        Returns the result and the outcome: "hit", "revalidated" or "miss".
+        """
+        entry = self._lookup(key)
+        now = time.time()
+        if entry is not None and entry.expires_at > now:
+            with self._lock:
+                self._hits += 1
+            return entry.result, "hit"
+
+        result = send(entry.validators() if entry is not None else {})
+        if entry is not None and result["status"] == 304:
+            entry.expires_at = now + ttl
+            self._store(key, entry)
+            with self._lock:
+                self._revalidated += 1
+            return entry.result, "revalidated"
+
+        with self._lock:
+            self._misses += 1
+        cache_control = (_header(result, "cache-control") or "").lower()
+        if result["status"] == 200 and "no-store" not in cache_control:
+            self._store(
+                key,
+                CachedResponse(
+                    result=result,
+                    etag=_header(result, "etag"),
+                    last_modified=_header(result, "last-modified"),
+                    expires_at=now + ttl,
+                    size=len(json.dumps(result, default=str)),
+                ),
+            )
+        return result, "miss"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses + self._revalidated
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "revalidated": self._revalidated,
+                "diskHits": self._disk_hits,
+                "evictions": self._evictions,
+                "hitRatio": round((self._hits + self._revalidated) / lookups, 4) if lookups else 0.0,
+            }
+
+    def _lookup(self, key: str) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        entry = self._read_disk(key)
+        if entry is not None:
+            self._remember(key, entry)
+            with self._lock:
+                self._disk_hits += 1
+        return entry
+
+    def _store(self, key: str, entry: CachedResponse) -> None:
+        self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def _remember(self, key: str, entry: CachedResponse) -> None:
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self._evictions += 1
+
+    def _read_disk(self, key: str) -> CachedResponse | None:
+        if self.disk_dir is None:
+            return None
+        try:
+            return CachedResponse(**json.loads((self.disk_dir / f"{key}.json").read_text()))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError):
+            logger.warning("Discarding unreadable HTTP cache entry %s", key)
+            return None
+
+    def _write_disk(self, key: str, entry: CachedResponse) -> None:
+        if self.disk_dir is None:
+            return
+        try:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            path = self.disk_dir / f"{key}.json"
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_text(json.dumps(asdict(entry), default=str))
+            os.replace(tmp_path, path)
+        except OSError:
+            logger.warning("Could not write HTTP cache entry %s", key, exc_info=True)
+
+
+response_cache = ResponseCache(
+    settings.http_cache_max_entries,
+    settings.http_cache_max_bytes,
+    settings.http_cache_dir,
+)
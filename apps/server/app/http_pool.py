@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+import httpx
+
+from .config import settings
+from .metrics import HTTP_REQUEST_SECONDS
+from .tracing import current_trace, record_span, span
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClientPool:
+    def __init__(
+        self,
+        max_connections_per_host: int,
+        max_keepalive_per_host: int,
+        keepalive_expiry: float,
+        http2: bool,
+        timeout: float,
+        max_hosts: int,
+    ) -> None:
+        self.limits = httpx.Limits(
+            max_connections=max_connections_per_host,
+            max_keepalive_connections=max_keepalive_per_host,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self.timeout = timeout
+        self.max_hosts = max_hosts
+        self._clients: OrderedDict[str, httpx.Client] = OrderedDict()
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._connections_opened = 0
+        # Per origin, counted from request() itself rather than httpx's private pool state.
+        self._in_flight: dict[str, int] = {}
+        self._opened_by_origin: dict[str, int] = {}
+
+    def request(self, method: str, url: str, timeout: float | None = None, **kwargs: Any) -> httpx.Response:
+        target = httpx.URL(url)
+        opened = False
+        traced = current_trace() is not None
+        phases: dict[str, int] = {}
+
+        def trace(event_name: str, _info: dict[str, Any]) -> None:
+            nonlocal opened
+            if event_name == "connection.connect_tcp.complete":
+                opened = True
+            if traced:
+                phases[event_name] = time.perf_counter_ns()
+
+        origin = _origin(target)
+        started = time.perf_counter()
+        with span(f"{method} {target.host}", "http", url=str(target.copy_with(query=None))):
+            client = self._client_for(target)
+            with self._lock:
+                self._in_flight[origin] = self._in_flight.get(origin, 0) + 1
+            try:
+                response = client.request(
+                    method,
+                    url,
+                    timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+                    extensions={"trace": trace},
+                    **kwargs,
+                )
+            finally:
+                with self._lock:
+                    self._in_flight[origin] -= 1
+                    self._requests += 1
+                    if opened:
+                        self._connections_opened += 1
+                        self._opened_by_origin[origin] = self._opened_by_origin.get(origin, 0) + 1
+            if traced:
+                _record_phases(phases)
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, target.host)
+        return response
+
+    def close(self) -> None:
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), OrderedDict()
+        for client in clients:
+            client.close()
+
+    def reset(self) -> None:
+        # Used after fork: drop inherited clients without closing the parent's sockets.
+        with self._lock:
+            self._clients = OrderedDict()
+            self._in_flight = {}
+            self._opened_by_origin = {}
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            requests, opened = self._requests, self._connections_opened
+            hosts = {
+                origin: {
+                    "connectionsOpened": self._opened_by_origin.get(origin, 0),
+                    "inUse": self._in_flight.get(origin, 0),
+                }
+                for origin in self._clients
+            }
+        return {
+            "requests": requests,
+            "connectionsOpened": opened,
+            "reuseRatio": round(1 - opened / requests, 4) if requests else 0.0,
+            "inUse": sum(host["inUse"] for host in hosts.values()),
+            "hosts": hosts,
+        }
+
+    def _client_for(self, url: httpx.URL) -> httpx.Client:
+        origin = _origin(url)
+        with self._lock:
+            client = self._clients.get(origin)
+            if client is not None:
+                self._clients.move_to_end(origin)
+                return client
+            with span("http.client", "http", origin=origin):
+                client = self._new_client()
+            self._clients[origin] = client
+            evicted = None
+            if len(self._clients) > self.max_hosts:
+                evicted_origin, evicted = self._clients.popitem(last=False)
+                self._opened_by_origin.pop(evicted_origin, None)
+                if not self._in_flight.get(evicted_origin):
+                    self._in_flight.pop(evicted_origin, None)
+        if evicted is not None:
+            evicted.close()
+        return client
+
+    def _new_client(self) -> httpx.Client:
+        if self.http2:
+            try:
+                return httpx.Client(limits=self.limits, timeout=self.timeout, http2=True)
+            except ImportError:
+                logger.warning("HTTP/2 requested but the h2 package is not installed")
+                self.http2 = False
+        return httpx.Client(limits=self.limits, timeout=self.timeout)
+
+
+def _origin(url: httpx.URL) -> str:
+    return f"{url.scheme}://{url.host}:{url.port or ''}"
+
+
+def _record_phases(phases: dict[str, int]) -> None:
+    # httpcore reports "<phase>.started"/"<phase>.complete" pairs: connect, send headers/body,
+    # receive headers/body. Each pair becomes a child span of the request.
+    for event_name, started in phases.items():
+        if not event_name.endswith(".started"):
+            continue
+        phase = event_name[: -len(".started")]
+        finished = phases.get(f"{phase}.complete")
+        if finished is not None:
+            record_span(phase, "http", started, finished)
+
+
+http_pool = HttpClientPool(
+    settings.http_max_connections_per_host,
+    settings.http_max_keepalive_per_host,
+    settings.http_keepalive_expiry,
+    settings.http_http2,
+    settings.http_timeout,
+    settings.http_max_hosts,
+)
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from .config import settings
+from .dispatcher import dispatcher
+from .governor import AdmissionRejected
+from .nodes import Items
+from .plans import ExecutionPlan
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyStore:
+    """Remember webhook idempotency keys for a time window, bounded to max_keys entries.
+
+    A key is claimed before the delivery is processed. Concurrent retries of an
+    in-flight delivery are reported as pending, and a failed delivery releases the
+    key so the sender can retry it.
+    """
+
+    def __init__(self, window_seconds: float, max_keys: int) -> None:
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any] | None]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._duplicates = 0
+
+    def claim(self, key: str) -> tuple[bool, dict[str, Any] | None]:
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._duplicates += 1
+                return False, entry[1]
+            self._entries[key] = (now + self.window_seconds, None)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+            return True, None
+
+    def complete(self, key: str, result: dict[str, Any]) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (entry[0], result)
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {"keys": len(self._entries), "duplicates": self._duplicates}
+
+    def _expire(self, now: float) -> None:
+        # Entries share one window length, so insertion order is also expiry order.
+        while self._entries:
+            key, (expires_at, _result) = next(iter(self._entries.items()))
+            if expires_at > now:
+                return
+            del self._entries[key]
+
+
+@dataclass
+class _Batch:
+    plan: ExecutionPlan
+    deadline: float
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    items: Items = field(default_factory=list)
+
+
+class WebhookBatcher:
+    """Merge webhook events for the same trigger into one execution.
+
+    A batch is submitted once it holds max_items events or when its first event has
+    waited max_wait_ms, whichever comes first. Deadlines are served by one daemon thread.
+    """
+
+    def __init__(self) -> None:
+        self._batches: dict[tuple[str, str], _Batch] = {}
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+        self._events = 0
+        self._submitted = 0
+        self._dropped = 0
+
+    def add(
+        self, plan: ExecutionPlan, node_id: str, items: Items, max_items: int, max_wait_ms: int
+    ) -> dict[str, Any]:
+        key = (plan.workflow_id, node_id)
+        ready: list[_Batch] = []
+        batch_id = None
+        with self._cond:
+            self._ensure_thread()
+            self._events += len(items)
+            remaining = items
+            while remaining:
+                batch = self._batches.get(key)
+                if batch is None:
+                    batch = self._batches[key] = _Batch(plan, time.monotonic() + max_wait_ms / 1000)
+                    self._cond.notify()
+                batch.plan = plan
+                room = max_items - len(batch.items)
+                batch.items.extend(remaining[:room])
+                remaining = remaining[room:]
+                batch_id = batch.id
+                if len(batch.items) >= max_items:
+                    ready.append(self._batches.pop(key))
+
+        rejected: AdmissionRejected | None = None
+        for full_batch in ready:
+            try:
+                self._submit(full_batch)
+            except AdmissionRejected as exc:
+                rejected = rejected or exc
+        if rejected is not None:
+            raise rejected
+        return {"batchId": batch_id, "accepted": len(items)}
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            return {
+                "open": len(self._batches),
+                "buffered": sum(len(batch.items) for batch in self._batches.values()),
+                "events": self._events,
+                "submitted": self._submitted,
+                "dropped": self._dropped,
+            }
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._closed = False
+            self._thread = threading.Thread(target=self._run, name="webhook-batcher", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    due = [
+                        key for key, batch in self._batches.items() if self._closed or batch.deadline <= now
+                    ]
+                    if due or self._closed:
+                        break
+                    deadlines = [batch.deadline for batch in self._batches.values()]
+                    self._cond.wait(min(deadlines) - now if deadlines else None)
+                batches = [self._batches.pop(key) for key in due]
+                closed = self._closed
+            for batch in batches:
+                try:
+                    self._submit(batch)
+                except AdmissionRejected as exc:
+                    logger.warning("Dropped webhook batch of %s events: %s", len(batch.items), exc)
+                except Exception:
+                    # Keep the flusher alive: one bad batch must not strand every later one.
+                    logger.exception("Dropped webhook batch of %s events", len(batch.items))
+            if closed:
+                return
+
+    def _submit(self, batch: _Batch) -> None:
+        try:
+            dispatcher.submit(batch.plan, batch.items, trigger="webhook")
+        except Exception:
+            with self._cond:
+                self._dropped += len(batch.items)
+            raise
+        with self._cond:
+            self._submitted += 1
+
+
+def submit_webhook_items(plan: ExecutionPlan, node_id: str, items: Items) -> dict[str, Any]:
+    node = plan.nodes.get(node_id)
+    params = node.params if node else {}
+    max_items = int(params.get("batchMaxItems") or 0)
+    max_wait_ms = int(params.get("batchMaxWaitMs") or 0)
+    if not max_items and not max_wait_ms:
+        return {"executionId": dispatcher.submit(plan, items, trigger="webhook")}
+    return webhook_batcher.add(
+        plan,
+        node_id,
+        items,
+        max_items or settings.webhook_batch_max_items,
+        max_wait_ms or settings.webhook_batch_max_wait_ms,
+    )
+
+
+idempotency_store = IdempotencyStore(
+    settings.webhook_idempotency_window_seconds, settings.webhook_idempotency_max_keys
+)
+webhook_batcher = WebhookBatcher()
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import func, or_
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from .db import SessionLocal
+from .models import Execution, JobLease, PendingExecution
+from .nodes import Items
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process in lease rows; unique across hosts and restarts.
+PROCESS_OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaderLease:
+    """Leader election through one row of job_leases.
+
+    renew() extends the lease if this process holds it or it has expired, and otherwise
+    loses the race on the primary key. Leadership is judged against the local monotonic
+    clock from before the write, so a stalled leader stops acting before anyone else can
+    take over (assuming host clocks agree to well within the lease length).
+    """
+
+    def __init__(self, name: str, owner: str, ttl_seconds: float) -> None:
+        self.name = name
+        self.owner = owner
+        self.ttl_seconds = ttl_seconds
+        self._valid_until = 0.0
+        self._changes = 0
+
+    @property
+    def is_leader(self) -> bool:
+        return time.monotonic() < self._valid_until
+
+    def renew(self) -> bool:
+        started = time.monotonic()
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl_seconds)
+        was_leader = self.is_leader
+        try:
+            with SessionLocal() as db:
+                updated = (
+                    db.query(JobLease)
+                    .filter(
+                        JobLease.name == self.name,
+                        or_(JobLease.owner == self.owner, JobLease.expires_at < now),
+                    )
+                    .update({"owner": self.owner, "expires_at": expires_at}, synchronize_session=False)
+                )
+                if not updated:
+                    db.add(JobLease(name=self.name, owner=self.owner, expires_at=expires_at))
+                db.commit()
+        except IntegrityError:
+            # Another process holds an unexpired lease.
+            self._valid_until = 0.0
+        except SQLAlchemyError:
+            # Keep whatever is left of the current lease; the next renewal retries.
+            logger.warning("Could not renew lease %s", self.name, exc_info=True)
+        else:
+            self._valid_until = started + self.ttl_seconds
+        if self.is_leader != was_leader:
+            self._changes += 1
+            logger.info("%s %s lease %s", self.owner, "acquired" if self.is_leader else "lost", self.name)
+        return self.is_leader
+
+    def release(self) -> None:
+        if not self.is_leader:
+            return
+        self._valid_until = 0.0
+        try:
+            with SessionLocal() as db:
+                db.query(JobLease).filter(JobLease.name == self.name, JobLease.owner == self.owner).delete()
+                db.commit()
+        except SQLAlchemyError:
+            logger.warning("Could not release lease %s", self.name, exc_info=True)
+
+    def stats(self) -> dict[str, Any]:
+        return {"name": self.name, "owner": self.owner, "leader": self.is_leader, "changes": self._changes}
+
+
+@dataclass
+class ClaimedExecution:
+    execution_id: str
+    workflow_id: str
+    trigger: str
+    items: Items
+    attempts: int
+
+
+class DurableQueue:
+    """Executions queued in pending_executions, claimed by any worker through a lease.
+
+    A claim is a conditional UPDATE on one row, so it works on SQLite and on server
+    databases without SELECT ... FOR UPDATE SKIP LOCKED. Holders renew their leases while
+    the run is queued or executing; when a process dies its leases expire and another
+    worker claims the run again, up to max_attempts.
+    """
+
+    def __init__(self, owner: str, lease_seconds: float, max_attempts: int) -> None:
+        self.owner = owner
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._claimed = 0
+        self._recovered = 0
+        self._abandoned = 0
+
+    def push(self, db: Session, execution_id: str, workflow_id: str, trigger: str, items: Items) -> None:
+        db.add(
+            PendingExecution(
+                execution_id=execution_id,
+                workflow_id=workflow_id,
+                trigger=trigger,
+                items_json=json.dumps(items),
+                attempts=0,
+                created_at=datetime.utcnow(),
+            )
+        )
+
+    def depth(self, db: Session) -> int:
+        return db.query(func.count(PendingExecution.execution_id)).scalar() or 0
+
+    def claim(self, limit: int) -> list[ClaimedExecution]:
+        if limit <= 0:
+            return []
+        now = datetime.utcnow()
+        claimable = or_(PendingExecution.lease_owner.is_(None), PendingExecution.lease_expires_at < now)
+        claimed: list[ClaimedExecution] = []
+        with SessionLocal() as db:
+            candidates = [
+                row[0]
+                for row in db.query(PendingExecution.execution_id)
+                .filter(claimable)
+                .order_by(PendingExecution.created_at)
+                .limit(limit)
+            ]
+            won = [
+                execution_id
+                for execution_id in candidates
+                if db.query(PendingExecution)
+                .filter(PendingExecution.execution_id == execution_id, claimable)
+                .update(
+                    {
+                        "lease_owner": self.owner,
+                        "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                        "attempts": PendingExecution.attempts + 1,
+                    },
+                    synchronize_session=False,
+                )
+            ]
+            db.commit()
+            if not won:
+                return []
+            rows = db.query(PendingExecution).filter(PendingExecution.execution_id.in_(won)).all()
+            for row in sorted(rows, key=lambda row: row.created_at):
+                if row.attempts > 1:
+                    self._recovered += 1
+                if row.attempts > self.max_attempts:
+                    self._abandon(db, row)
+                    continue
+                claimed.append(
+                    ClaimedExecution(
+                        row.execution_id, row.workflow_id, row.trigger, json.loads(row.items_json), row.attempts
+                    )
+                )
+            db.commit()
+        self._claimed += len(claimed)
+        return claimed
+
+    def heartbeat(self) -> None:
+        expires_at = datetime.utcnow() + timedelta(seconds=self.lease_seconds)
+        try:
+            with SessionLocal() as db:
+                db.query(PendingExecution).filter(PendingExecution.lease_owner == self.owner).update(
+                    {"lease_expires_at": expires_at}, synchronize_session=False
+                )
+                db.commit()
+        except SQLAlchemyError:
+            logger.warning("Could not renew execution leases", exc_info=True)
+
+    def complete(self, execution_id: str) -> None:
+        with SessionLocal() as db:
+            db.query(PendingExecution).filter(
+                PendingExecution.execution_id == execution_id, PendingExecution.lease_owner == self.owner
+            ).delete(synchronize_session=False)
+            db.commit()
+
+    def release_all(self) -> None:
+        """Hand back runs this process claimed but did not finish, e.g. on shutdown."""
+        with SessionLocal() as db:
+            db.query(PendingExecution).filter(PendingExecution.lease_owner == self.owner).update(
+                {"lease_owner": None, "lease_expires_at": None}, synchronize_session=False
+            )
+            db.commit()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "owner": self.owner,
+            "claimed": self._claimed,
+            "recovered": self._recovered,
+            "abandoned": self._abandoned,
+        }
+
+    def _abandon(self, db: Session, row: PendingExecution) -> None:
+        self._abandoned += 1
+        logger.error("Execution %s abandoned after %s attempts", row.execution_id, row.attempts - 1)
+        db.query(Execution).filter(Execution.id == row.execution_id).update(
+            {
+                "status": "failed",
+                "error": f"Abandoned after {row.attempts - 1} attempts",
+                "finished_at": datetime.utcnow(),
+            },
+            synchronize_session=False,
+        )
+        db.delete(row)
@@ -1,27 +1,57 @@
 from __future__ import annotations
 
+import asyncio
+import base64
+import hashlib
 import json
+import time
 import uuid
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import Any, AsyncIterator, Callable, Iterator, Literal
 
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
-
-from .db import Base, SessionLocal, engine
-from .models import Execution, ExecutionStep, WebhookEndpoint, Workflow
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session, defer
+
+from .blobs import load_payloads, load_raw_payloads
+from .config import settings
+from .db import SessionLocal, upgrade_schema
+from .dispatcher import dispatcher
+from .events import FINISHED_EVENT, ExecutionEvent, Subscription, event_bus
+from .governor import OverlapRejected, QueueFullError
+from .http_cache import response_cache
+from .http_pool import http_pool
+from .ingest import idempotency_store, submit_webhook_items, webhook_batcher
+from .metrics import WEBHOOK_SECONDS, metrics
+from .retention import retention_stats, start_retention
+from .sandbox import sandbox_pool
+from .webhooks import WebhookRoute, normalize_path, webhook_router
+from .models import Execution, ExecutionStep, PendingExecution, WebhookEndpoint, Workflow
 from .nodes import serialize_node_definitions
-from .runtime import execute_workflow
-from .scheduler import reschedule_cron, shutdown_scheduler
+from .plans import ExecutionPlan, plan_cache, workflow_to_dict
+from .scheduler import (
+    load_cron_jobs,
+    remove_workflow_cron,
+    scheduler_stats,
+    shutdown_scheduler,
+    sync_workflow_cron,
+)
 from .schemas import (
     ExecutionDetailResponse,
+    ExecutionPage,
     ExecutionResponse,
     ExecutionStepResponse,
+    StepPayloadResponse,
     WorkflowCreate,
     WorkflowResponse,
+    WorkflowSummary,
+    WorkflowSummaryPage,
 )
 
 app = FastAPI()
@@ -34,18 +64,6 @@ def get_db() -> Session:
     return SessionLocal()
 
 
-def workflow_to_dict(workflow: Workflow) -> dict[str, Any]:
-    return {
-        "id": workflow.id,
-        "name": workflow.name,
-        "active": workflow.active,
-        "nodes": json.loads(workflow.nodes_json),
-        "edges": json.loads(workflow.edges_json),
-        "createdAt": workflow.created_at,
-        "updatedAt": workflow.updated_at,
-    }
-
-
 def execution_to_response(execution: Execution) -> ExecutionResponse:
     return ExecutionResponse(
         id=execution.id,
@@ -57,7 +75,7 @@ def execution_to_response(execution: Execution) -> ExecutionResponse:
     )
 
 
-def step_to_response(step: ExecutionStep) -> ExecutionStepResponse:
+def step_metadata(step: ExecutionStep) -> dict[str, Any]:
     return ExecutionStepResponse(
         id=step.id,
         executionId=step.execution_id,
@@ -65,34 +83,224 @@ def step_to_response(step: ExecutionStep) -> ExecutionStepResponse:
         status=step.status,
         startedAt=step.started_at,
         finishedAt=step.finished_at,
-        input=json.loads(step.input_json) if step.input_json else None,
-        output=json.loads(step.output_json) if step.output_json else None,
         error=step.error,
+    ).model_dump(mode="json", exclude={"input", "output"})
+
+
+def step_payload(digest: str | None, legacy_json: str | None, payloads: dict[str, Any]) -> Any:
+    if digest:
+        return payloads.get(digest)
+    return json.loads(legacy_json) if legacy_json else None
+
+
+def raw_step_payload(digest: str | None, legacy_json: str | None, payloads: dict[str, bytes]) -> bytes:
+    if digest:
+        return payloads.get(digest, b"null")
+    return legacy_json.encode() if legacy_json else b"null"
+
+
+def iter_execution_json(execution_id: str, fields: tuple[str, ...]) -> Iterator[bytes]:
+    """Encode an execution detail response a batch of steps at a time.
+
+    Stored payloads are already JSON, so they are copied into the output without being
+    parsed, and only one batch of steps and payloads is held in memory at once.
+    """
+    with SessionLocal() as db:
+        execution = db.query(Execution).filter(Execution.id == execution_id).first()
+        if not execution:
+            return
+        head = execution_to_response(execution).model_dump_json()
+        yield head[:-1].encode() + b',"steps":['
+        query = db.query(ExecutionStep).filter(ExecutionStep.execution_id == execution_id)
+        if "input" not in fields:
+            query = query.options(defer(ExecutionStep.input_json))
+        if "output" not in fields:
+            query = query.options(defer(ExecutionStep.output_json))
+        steps = query.order_by(ExecutionStep.started_at.asc()).yield_per(settings.execution_stream_batch)
+        separator = b""
+        for batch in iter_batches(steps, settings.execution_stream_batch):
+            hashes = set()
+            if "input" in fields:
+                hashes |= {step.input_hash for step in batch}
+            if "output" in fields:
+                hashes |= {step.output_hash for step in batch}
+            payloads = load_raw_payloads(db, hashes)
+            chunk = []
+            for step in batch:
+                parts = [separator, json.dumps(step_metadata(step), separators=(",", ":"))[:-1].encode()]
+                if "input" in fields:
+                    parts += [b',"input":', raw_step_payload(step.input_hash, step.input_json, payloads)]
+                if "output" in fields:
+                    parts += [b',"output":', raw_step_payload(step.output_hash, step.output_json, payloads)]
+                parts.append(b"}")
+                chunk.append(b"".join(parts))
+                separator = b","
+            yield b"".join(chunk)
+        yield b"]}"
+
+
+def load_execution(execution_id: str) -> Execution | None:
+    with SessionLocal() as db:
+        return db.query(Execution).filter(Execution.id == execution_id).first()
+
+
+def finished_snapshot(execution: Execution) -> ExecutionEvent | None:
+    """An execution.finished event rebuilt from the row, or None while the run is still active."""
+    if execution.status in ("queued", "running"):
+        return None
+    return ExecutionEvent(
+        0,
+        FINISHED_EVENT,
+        execution.id,
+        execution.workflow_id,
+        {"status": execution.status, "error": execution.error, "finishedAt": execution.finished_at},
+    )
+
+
+def last_event_id(request: Request) -> int:
+    value = request.headers.get("last-event-id") or request.query_params.get("lastEventId") or "0"
+    return int(value) if value.isdigit() else 0
+
+
+def event_stream(
+    request: Request, subscription: Subscription, replay: list[ExecutionEvent], until_finished: bool
+) -> StreamingResponse:
+    async def generate() -> AsyncIterator[bytes]:
+        try:
+            for event in replay:
+                yield event.to_sse()
+                if until_finished and event.type == FINISHED_EVENT:
+                    return
+            while True:
+                try:
+                    event = await subscription.get(settings.event_keepalive_seconds)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    if subscription.execution_id is not None:
+                        # Another worker may run it (EXECUTOR_QUEUE=database) and publish on its own bus.
+                        execution = await run_in_threadpool(load_execution, subscription.execution_id)
+                        if execution is None:
+                            return
+                        snapshot = finished_snapshot(execution)
+                        if snapshot is not None:
+                            yield snapshot.to_sse()
+                            return
+                    yield b": keepalive\n\n"
+                    continue
+                if event is None:
+                    # Fell too far behind; the client reconnects with Last-Event-ID and is replayed.
+                    yield b"event: overflow\ndata: {}\n\n"
+                    return
+                yield event.to_sse()
+                if until_finished and event.type == FINISHED_EVENT:
+                    return
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
+def iter_batches(rows: Any, size: int) -> Iterator[list[Any]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def slice_items(value: Any, offset: int, limit: int | None) -> tuple[Any, Any]:
+    """Slice a step payload by item index; handle maps are sliced per handle."""
+    end = None if limit is None else offset + limit
+    if isinstance(value, list):
+        return value[offset:end], len(value)
+    if isinstance(value, dict) and value and all(isinstance(items, list) for items in value.values()):
+        return (
+            {handle: items[offset:end] for handle, items in value.items()},
+            {handle: len(items) for handle, items in value.items()},
+        )
+    # Truncated previews and streamed step counts are not item lists.
+    return value, None
+
+
 @app.on_event("startup")
 def startup() -> None:
-    Base.metadata.create_all(bind=engine)
+    upgrade_schema()
     with SessionLocal() as db:
+        webhook_router.load(db)
         reschedule(db)
+    start_retention()
+    sandbox_pool.start()
+    dispatcher.start()
 
 
 @app.on_event("shutdown")
 def shutdown() -> None:
     shutdown_scheduler()
+    webhook_batcher.close()
+    dispatcher.shutdown()
+    http_pool.close()
+    sandbox_pool.close()
 
 
 @app.get("/api/nodes")
-def list_nodes() -> dict[str, Any]:
-    return {"nodes": serialize_node_definitions()}
+def list_nodes(request: Request) -> Response:
+    body, etag = node_definitions_document()
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=cache_headers(etag))
+    return Response(body, media_type="application/json", headers=cache_headers(etag))
 
 
-@app.get("/api/workflows", response_model=list[WorkflowResponse])
-def list_workflows() -> list[WorkflowResponse]:
+@app.get("/api/stats")
+def get_stats() -> dict[str, Any]:
+    return {
+        "queue": dispatcher.stats(),
+        "http": http_pool.stats(),
+        "httpCache": response_cache.stats(),
+        "sandbox": sandbox_pool.stats(),
+        "plans": plan_cache.stats(),
+        "webhooks": {
+            **webhook_router.stats(),
+            "batching": webhook_batcher.stats(),
+            "idempotency": idempotency_store.stats(),
+        },
+        "retention": retention_stats(),
+        "scheduler": scheduler_stats(),
+        "events": event_bus.stats(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics() -> PlainTextResponse:
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/workflows", response_model=list[WorkflowResponse] | WorkflowSummaryPage)
+def list_workflows(
+    request: Request,
+    view: str = Query("full", pattern="^(full|summary)$"),
+    after: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+) -> Response:
     with SessionLocal() as db:
-        workflows = db.query(Workflow).all()
-        return [WorkflowResponse(**workflow_to_dict(wf)) for wf in workflows]
+        count, last_updated = db.query(func.count(Workflow.id), func.max(Workflow.updated_at)).one()
+        etag = make_etag(count, last_updated, view, after, limit)
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=cache_headers(etag))
+        if view == "summary":
+            payload: Any = summarize_workflows(db, after, limit)
+        else:
+            payload = [WorkflowResponse(**workflow_to_dict(wf)) for wf in db.query(Workflow).all()]
+        return JSONResponse(jsonable_encoder(payload), headers=cache_headers(etag))
 
 
 @app.post("/api/workflows", response_model=WorkflowResponse)
@@ -102,25 +310,30 @@ def create_workflow(payload: WorkflowCreate) -> WorkflowResponse:
             id=str(uuid.uuid4()),
             name=payload.name,
             active=payload.active,
-            nodes_json=payload.nodes.model_dump_json(),
-            edges_json=payload.edges.model_dump_json(),
+            nodes_json=json.dumps([node.model_dump() for node in payload.nodes]),
+            edges_json=json.dumps([edge.model_dump() for edge in payload.edges]),
+            settings_json=json.dumps(payload.settings.model_dump(exclude_none=True)),
+            node_count=len(payload.nodes),
             created_at=datetime.utcnow(),
             updated_at=datetime.utcnow(),
         )
         db.add(workflow)
         db.commit()
-        register_webhooks(db, workflow.id, payload.nodes)
-        reschedule(db)
-        return WorkflowResponse(**workflow_to_dict(workflow))
+        plan_cache.invalidate(workflow.id)
+        register_webhooks(db, workflow.id, payload.active, payload.nodes)
+        workflow_dict = workflow_to_dict(workflow)
+        sync_workflow_cron(workflow_dict)
+        return WorkflowResponse(**workflow_dict)
 
 
 @app.get("/api/workflows/{workflow_id}", response_model=WorkflowResponse)
-def get_workflow(workflow_id: str) -> WorkflowResponse:
+def get_workflow(workflow_id: str, request: Request) -> Response:
     with SessionLocal() as db:
         workflow = db.query(Workflow).filter(Workflow.id == workflow_id).first()
         if not workflow:
             raise HTTPException(status_code=404, detail="Workflow not found")
-        return WorkflowResponse(**workflow_to_dict(workflow))
+        etag = make_etag(workflow.id, workflow.updated_at)
+        return conditional_json(request, etag, lambda: WorkflowResponse(**workflow_to_dict(workflow)))
 
 
 @app.put("/api/workflows/{workflow_id}", response_model=WorkflowResponse)
@@ -131,14 +344,18 @@ def update_workflow(workflow_id: str, payload: WorkflowCreate) -> WorkflowRespon
             raise HTTPException(status_code=404, detail="Workflow not found")
         workflow.name = payload.name
         workflow.active = payload.active
-        workflow.nodes_json = payload.nodes.model_dump_json()
-        workflow.edges_json = payload.edges.model_dump_json()
+        workflow.nodes_json = json.dumps([node.model_dump() for node in payload.nodes])
+        workflow.edges_json = json.dumps([edge.model_dump() for edge in payload.edges])
+        workflow.settings_json = json.dumps(payload.settings.model_dump(exclude_none=True))
+        workflow.node_count = len(payload.nodes)
         workflow.updated_at = datetime.utcnow()
         db.add(workflow)
         db.commit()
-        register_webhooks(db, workflow.id, payload.nodes)
-        reschedule(db)
-        return WorkflowResponse(**workflow_to_dict(workflow))
+        plan_cache.invalidate(workflow.id)
+        register_webhooks(db, workflow.id, payload.active, payload.nodes)
+        workflow_dict = workflow_to_dict(workflow)
+        sync_workflow_cron(workflow_dict)
+        return WorkflowResponse(**workflow_dict)
 
 
 @app.delete("/api/workflows/{workflow_id}")
@@ -147,77 +364,191 @@ def delete_workflow(workflow_id: str) -> dict[str, bool]:
         workflow = db.query(Workflow).filter(Workflow.id == workflow_id).first()
         if not workflow:
             raise HTTPException(status_code=404, detail="Workflow not found")
+        dispatcher.cancel_workflow(workflow_id)
         db.query(WebhookEndpoint).filter(WebhookEndpoint.workflow_id == workflow_id).delete()
-        db.query(ExecutionStep).join(Execution).filter(Execution.workflow_id == workflow_id).delete()
+        db.query(PendingExecution).filter(PendingExecution.workflow_id == workflow_id).delete()
+        execution_ids = select(Execution.id).where(Execution.workflow_id == workflow_id)
+        db.query(ExecutionStep).filter(ExecutionStep.execution_id.in_(execution_ids)).delete(
+            synchronize_session=False
+        )
         db.query(Execution).filter(Execution.workflow_id == workflow_id).delete()
         db.delete(workflow)
         db.commit()
-        reschedule(db)
+        plan_cache.invalidate(workflow_id)
+        webhook_router.remove_workflow(workflow_id)
+        remove_workflow_cron(workflow_id)
         return {"ok": True}
 
 
-@app.post("/api/workflows/{workflow_id}/run")
+@app.post("/api/workflows/{workflow_id}/run", status_code=202)
 def run_workflow(workflow_id: str) -> dict[str, str]:
-    with SessionLocal() as db:
-        workflow = db.query(Workflow).filter(Workflow.id == workflow_id).first()
-        if not workflow:
-            raise HTTPException(status_code=404, detail="Workflow not found")
-        workflow_dict = workflow_to_dict(workflow)
-        execution_id = execute_workflow(db, workflow_dict, [])
-        return {"executionId": execution_id}
-
-
-@app.get("/api/executions", response_model=list[ExecutionResponse])
-def list_executions(workflowId: str | None = None) -> list[ExecutionResponse]:
+    plan = plan_cache.get(workflow_id)
+    if not plan:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    execution_id = enqueue_execution(plan, [], "manual")
+    return {"executionId": execution_id}
+
+
+@app.get("/api/executions", response_model=ExecutionPage)
+def list_executions(
+    workflowId: str | None = None,
+    status: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    after: str | None = None,
+    limit: int = Query(50, ge=1, le=500),
+) -> ExecutionPage:
     with SessionLocal() as db:
         query = db.query(Execution)
         if workflowId:
             query = query.filter(Execution.workflow_id == workflowId)
-        executions = query.order_by(Execution.started_at.desc()).all()
-        return [execution_to_response(execution) for execution in executions]
+        if status:
+            query = query.filter(Execution.status == status)
+        if since:
+            query = query.filter(Execution.started_at >= since)
+        if until:
+            query = query.filter(Execution.started_at < until)
+        if after:
+            started_at, execution_id = decode_cursor(after)
+            query = query.filter(
+                or_(
+                    Execution.started_at < started_at,
+                    and_(Execution.started_at == started_at, Execution.id < execution_id),
+                )
+            )
+        executions = (
+            query.order_by(Execution.started_at.desc(), Execution.id.desc()).limit(limit + 1).all()
+        )
+        has_more = len(executions) > limit
+        executions = executions[:limit]
+        return ExecutionPage(
+            items=[execution_to_response(execution) for execution in executions],
+            nextCursor=(
+                encode_cursor(executions[-1].started_at, executions[-1].id) if has_more else None
+            ),
+            hasMore=has_more,
+        )
 
 
 @app.get("/api/executions/{execution_id}", response_model=ExecutionDetailResponse)
-def get_execution(execution_id: str) -> ExecutionDetailResponse:
+def get_execution(
+    execution_id: str,
+    payloads: str = Query("all", pattern="^(all|input|output|none)$"),
+) -> StreamingResponse:
     with SessionLocal() as db:
-        execution = db.query(Execution).filter(Execution.id == execution_id).first()
-        if not execution:
+        if not db.query(Execution.id).filter(Execution.id == execution_id).first():
+            raise HTTPException(status_code=404, detail="Execution not found")
+    fields = {"all": ("input", "output"), "input": ("input",), "output": ("output",), "none": ()}[payloads]
+    return StreamingResponse(iter_execution_json(execution_id, fields), media_type="application/json")
+
+
+@app.get("/api/executions/{execution_id}/events")
+async def execution_events(execution_id: str, request: Request) -> StreamingResponse:
+    subscription, replay = event_bus.subscribe(
+        asyncio.get_running_loop(), execution_id=execution_id, last_event_id=last_event_id(request)
+    )
+    if not replay:
+        # Nothing in memory: the run is unknown, finished before this process started, or queued.
+        execution = await run_in_threadpool(load_execution, execution_id)
+        if execution is None:
+            event_bus.unsubscribe(subscription)
             raise HTTPException(status_code=404, detail="Execution not found")
-        steps = (
+        snapshot = finished_snapshot(execution)
+        if snapshot is not None:
+            event_bus.unsubscribe(subscription)
+            return event_stream(request, subscription, [snapshot], until_finished=True)
+    return event_stream(request, subscription, replay, until_finished=True)
+
+
+@app.get("/api/workflows/{workflow_id}/events")
+async def workflow_events(workflow_id: str, request: Request) -> StreamingResponse:
+    subscription, replay = event_bus.subscribe(
+        asyncio.get_running_loop(), workflow_id=workflow_id, last_event_id=last_event_id(request)
+    )
+    return event_stream(request, subscription, replay, until_finished=False)
+
+
+@app.get("/api/executions/{execution_id}/steps/{step_id}/{field}", response_model=StepPayloadResponse)
+def get_step_payload(
+    execution_id: str,
+    step_id: str,
+    field: Literal["input", "output"],
+    offset: int = Query(0, ge=0),
+    limit: int | None = Query(None, ge=1),
+) -> StepPayloadResponse:
+    with SessionLocal() as db:
+        step = (
             db.query(ExecutionStep)
-            .filter(ExecutionStep.execution_id == execution_id)
-            .order_by(ExecutionStep.started_at.asc())
-            .all()
+            .filter(ExecutionStep.execution_id == execution_id, ExecutionStep.id == step_id)
+            .first()
         )
-        return ExecutionDetailResponse(
-            **execution_to_response(execution).model_dump(),
-            steps=[step_to_response(step) for step in steps],
+        if not step:
+            raise HTTPException(status_code=404, detail="Step not found")
+        digest, legacy_json = (
+            (step.input_hash, step.input_json) if field == "input" else (step.output_hash, step.output_json)
         )
+        value = step_payload(digest, legacy_json, load_payloads(db, {digest}))
+    data, total = slice_items(value, offset, limit)
+    return StepPayloadResponse(
+        executionId=execution_id, stepId=step_id, field=field, offset=offset, total=total, data=data
+    )
 
 
-@app.api_route("/api/webhooks/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
-async def webhook_handler(path: str, request: Request) -> dict[str, str]:
+@app.get("/api/executions/{execution_id}/trace")
+def get_execution_trace(execution_id: str) -> JSONResponse:
     with SessionLocal() as db:
-        webhook = (
-            db.query(WebhookEndpoint)
-            .filter(WebhookEndpoint.path == path, WebhookEndpoint.method == request.method)
-            .first()
-        )
-        if not webhook:
-            raise HTTPException(status_code=404, detail="Webhook not found")
-        workflow = db.query(Workflow).filter(Workflow.id == webhook.workflow_id).first()
-        if not workflow:
-            raise HTTPException(status_code=404, detail="Workflow not found")
+        execution = db.query(Execution).filter(Execution.id == execution_id).first()
+        if not execution:
+            raise HTTPException(status_code=404, detail="Execution not found")
+        if not execution.trace_hash:
+            raise HTTPException(status_code=404, detail="Execution was not traced")
+        trace = load_payloads(db, {execution.trace_hash}).get(execution.trace_hash)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace was pruned")
+    return JSONResponse(
+        trace,
+        headers={"Content-Disposition": f'attachment; filename="trace-{execution_id}.json"'},
+    )
+
+
+@app.api_route(
+    "/api/webhooks/{path:path}",
+    methods=["GET", "POST", "PUT", "PATCH", "DELETE"],
+    status_code=202,
+)
+async def webhook_handler(path: str, request: Request, response: Response) -> dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        route, path_params, plan = await resolve_webhook(request.method, path)
         body = None
         if "application/json" in (request.headers.get("content-type") or ""):
             body = await request.json()
-        payload = {
-            "body": body,
-            "headers": dict(request.headers),
-            "query": dict(request.query_params),
-        }
-        execution_id = execute_workflow(db, workflow_to_dict(workflow), [payload])
-        return {"executionId": execution_id}
+        payload = webhook_payload(request, path_params, body)
+        return await ingest_webhook(request, response, plan, route.node_id, [payload])
+    finally:
+        WEBHOOK_SECONDS.observe(time.perf_counter() - started, request.method)
+
+
+@app.post("/api/bulk/webhooks/{path:path}", status_code=202)
+async def bulk_webhook_handler(path: str, request: Request, response: Response) -> dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        route, path_params, plan = await resolve_webhook("POST", path)
+        try:
+            body = await request.json()
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail="Body must be JSON") from exc
+        events = body.get("events") if isinstance(body, dict) else body
+        if not isinstance(events, list) or not events:
+            raise HTTPException(status_code=400, detail="Body must be a non-empty array of events")
+        if len(events) > settings.webhook_bulk_max_events:
+            raise HTTPException(
+                status_code=413, detail=f"At most {settings.webhook_bulk_max_events} events per request"
+            )
+        items = [webhook_payload(request, path_params, event) for event in events]
+        return await ingest_webhook(request, response, plan, route.node_id, items)
+    finally:
+        WEBHOOK_SECONDS.observe(time.perf_counter() - started, "BULK")
 
 
 @app.get("/")
@@ -233,13 +564,14 @@ def serve_static(path: str) -> FileResponse:
     return FileResponse(STATIC_DIR / "index.html")
 
 
-def register_webhooks(db: Session, workflow_id: str, nodes: list[Any]) -> None:
+def register_webhooks(db: Session, workflow_id: str, active: bool, nodes: list[Any]) -> None:
     db.query(WebhookEndpoint).filter(WebhookEndpoint.workflow_id == workflow_id).delete()
+    endpoints: list[tuple[str, str, str]] = []
     for node in nodes:
         if node.type != "webhookTrigger":
             continue
         params = node.data.get("params", {})
-        path = str(params.get("path", "")).lstrip("/")
+        path = normalize_path(str(params.get("path", "")))
         if not path:
             continue
         webhook = WebhookEndpoint(
@@ -250,9 +582,159 @@ def register_webhooks(db: Session, workflow_id: str, nodes: list[Any]) -> None:
             node_id=node.id,
         )
         db.add(webhook)
+        endpoints.append((webhook.method, webhook.path, webhook.node_id))
     db.commit()
+    webhook_router.set_workflow(workflow_id, active, endpoints)
 
 
 def reschedule(db: Session) -> None:
     workflows = db.query(Workflow).all()
-    reschedule_cron(SessionLocal, [workflow_to_dict(workflow) for workflow in workflows])
+    load_cron_jobs([workflow_to_dict(workflow) for workflow in workflows])
+
+
+def encode_cursor(moment: datetime, row_id: str) -> str:
+    raw = f"{moment.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        moment, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(moment), row_id
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
+def summarize_workflows(db: Session, after: str | None, limit: int) -> WorkflowSummaryPage:
+    # Ordered by creation time, which never changes, so cursors stay valid across edits.
+    query = db.query(
+        Workflow.id,
+        Workflow.name,
+        Workflow.active,
+        Workflow.node_count,
+        Workflow.created_at,
+        Workflow.updated_at,
+    )
+    if after:
+        created_at, workflow_id = decode_cursor(after)
+        query = query.filter(
+            or_(
+                Workflow.created_at > created_at,
+                and_(Workflow.created_at == created_at, Workflow.id > workflow_id),
+            )
+        )
+    rows = query.order_by(Workflow.created_at, Workflow.id).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    # Rows saved before node_count existed fall back to parsing their nodes once.
+    legacy = [row.id for row in rows if row.node_count is None]
+    legacy_counts: dict[str, int] = {}
+    if legacy:
+        legacy_rows = db.query(Workflow.id, Workflow.nodes_json).filter(Workflow.id.in_(legacy))
+        for workflow_id, nodes_json in legacy_rows:
+            legacy_counts[workflow_id] = len(json.loads(nodes_json))
+    return WorkflowSummaryPage(
+        items=[
+            WorkflowSummary(
+                id=row.id,
+                name=row.name,
+                active=row.active,
+                nodeCount=legacy_counts.get(row.id, 0) if row.node_count is None else row.node_count,
+                updatedAt=row.updated_at,
+            )
+            for row in rows
+        ],
+        nextCursor=encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None,
+        hasMore=has_more,
+    )
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    # If-None-Match uses weak comparison, so a W/ prefix added by a proxy still matches.
+    candidates = {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def cache_headers(etag: str) -> dict[str, str]:
+    # no-cache lets browsers keep the body but revalidate it on every request.
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def conditional_json(request: Request, etag: str, build: Callable[[], Any]) -> Response:
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=cache_headers(etag))
+    return JSONResponse(jsonable_encoder(build()), headers=cache_headers(etag))
+
+
+@lru_cache(maxsize=1)
+def node_definitions_document() -> tuple[bytes, str]:
+    body = json.dumps({"nodes": serialize_node_definitions()}, separators=(",", ":")).encode()
+    return body, make_etag(hashlib.sha256(body).hexdigest())
+
+
+def enqueue_execution(plan: ExecutionPlan, initial_items: list[dict[str, Any]], trigger: str) -> str:
+    return admit(dispatcher.submit, plan, initial_items, trigger=trigger)
+
+
+def admit(submit: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    try:
+        return submit(*args, **kwargs)
+    except QueueFullError as exc:
+        raise HTTPException(status_code=429, detail=str(exc)) from exc
+    except OverlapRejected as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+
+
+async def resolve_webhook(method: str, path: str) -> tuple[WebhookRoute, dict[str, str], ExecutionPlan]:
+    match = webhook_router.resolve(method, path)
+    if not match:
+        raise HTTPException(status_code=404, detail="Webhook not found")
+    route, path_params = match
+    plan = plan_cache.cached(route.workflow_id)
+    if plan is None:
+        plan = await run_in_threadpool(plan_cache.get, route.workflow_id)
+    if not plan:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    return route, path_params, plan
+
+
+def webhook_payload(request: Request, path_params: dict[str, str], body: Any) -> dict[str, Any]:
+    return {
+        "body": body,
+        "headers": dict(request.headers),
+        "query": dict(request.query_params),
+        "params": path_params,
+    }
+
+
+async def ingest_webhook(
+    request: Request, response: Response, plan: ExecutionPlan, node_id: str, items: list[dict[str, Any]]
+) -> dict[str, Any]:
+    node = plan.nodes.get(node_id)
+    header = (node.params if node else {}).get("idempotencyHeader") or settings.webhook_idempotency_header
+    idempotency_key = request.headers.get(header) if header else None
+    if not idempotency_key:
+        return await run_in_threadpool(admit, submit_webhook_items, plan, node_id, items)
+
+    key = f"{plan.workflow_id}:{idempotency_key}"
+    claimed, previous = idempotency_store.claim(key)
+    if not claimed:
+        if previous is None:
+            raise HTTPException(status_code=409, detail="A delivery with this idempotency key is in progress")
+        response.status_code = 200
+        return {**previous, "duplicate": True}
+    try:
+        result = await run_in_threadpool(admit, submit_webhook_items, plan, node_id, items)
+    except Exception:
+        idempotency_store.release(key)
+        raise
+    idempotency_store.complete(key, result)
+    return result
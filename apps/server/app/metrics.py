@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .tracing import span
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool) -> None:
+        self.enabled = enabled
+        self._metrics: list[Counter | Histogram] = []
+
+    def counter(self, name: str, documentation: str, labels: tuple[str, ...] = ()) -> Counter:
+        metric = Counter(self, name, documentation, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(self, name, documentation, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "".join(metric.render() for metric in self._metrics)
+
+
+class Counter:
+    def __init__(
+        self, registry: MetricsRegistry, name: str, documentation: str, labels: tuple[str, ...]
+    ) -> None:
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> str:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.documentation}\n", f"# TYPE {self.name} counter\n"]
+        lines += [f"{self.name}{_labels(self.labels, key)} {value}\n" for key, value in values]
+        return "".join(lines)
+
+
+class Histogram:
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...],
+        buckets: tuple[float, ...],
+    ) -> None:
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        # Per label set: per-bucket counts (non-cumulative, last slot is +Inf), sum, count.
+        self._series: dict[tuple[str, ...], list[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        if not self.registry.enabled:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> str:
+        with self._lock:
+            series = sorted(
+                (key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items()
+            )
+        lines = [f"# HELP {self.name} {self.documentation}\n", f"# TYPE {self.name} histogram\n"]
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, le)} {cumulative}\n")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {total}\n")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {count}\n")
+        return "".join(lines)
+
+
+metrics = MetricsRegistry(settings.metrics_enabled)
+
+EXECUTIONS_TOTAL = metrics.counter(
+    "workflow_executions_total", "Finished executions by final status.", ("status",)
+)
+EXECUTION_SECONDS = metrics.histogram(
+    "workflow_execution_duration_seconds", "Execution wall time per workflow.", ("workflow_id",)
+)
+QUEUE_WAIT_SECONDS = metrics.histogram(
+    "workflow_execution_queue_wait_seconds", "Time between queueing and starting an execution."
+)
+NODE_SECONDS = metrics.histogram(
+    "workflow_node_duration_seconds", "Node handler run time per node type.", ("node_type",)
+)
+DB_COMMIT_SECONDS = metrics.histogram("workflow_db_commit_seconds", "Commit latency during executions.")
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "workflow_http_request_duration_seconds", "httpRequest upstream latency per host.", ("host",)
+)
+CODE_SPAWN_SECONDS = metrics.histogram("workflow_code_worker_spawn_seconds", "Code sandbox worker start time.")
+CODE_RUN_SECONDS = metrics.histogram("workflow_code_run_seconds", "Code node round trip through the sandbox.")
+WEBHOOK_SECONDS = metrics.histogram(
+    "workflow_webhook_request_duration_seconds", "Webhook request handling time.", ("method",)
+)
+
+
+def timed_commit(db: Session) -> None:
+    with span("db.commit", "db"):
+        if not metrics.enabled:
+            db.commit()
+            return
+        started = time.perf_counter()
+        db.commit()
+        DB_COMMIT_SECONDS.observe(time.perf_counter() - started)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Boolean, DateTime, ForeignKey, String, Text
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, LargeBinary, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .db import Base
 
@@ -12,6 +12,9 @@ class Workflow(Base):
     active: Mapped[bool] = mapped_column(Boolean, default=False)
     nodes_json: Mapped[str] = mapped_column(Text)
     edges_json: Mapped[str] = mapped_column(Text)
+    settings_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Kept alongside nodes_json so listings do not have to parse the graph.
+    node_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
@@ -27,6 +30,10 @@ class Workflow(Base):
 
 class Execution(Base):
     __tablename__ = "executions"
+    __table_args__ = (
+        Index("ix_executions_workflow_started", "workflow_id", "started_at", "id"),
+        Index("ix_executions_started", "started_at", "id"),
+    )
 
     id: Mapped[str] = mapped_column(String, primary_key=True)
     workflow_id: Mapped[str] = mapped_column(String, ForeignKey("workflows.id"))
@@ -34,6 +41,7 @@ class Execution(Base):
     started_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     error: Mapped[str | None] = mapped_column(String, nullable=True)
+    trace_hash: Mapped[str | None] = mapped_column(String, nullable=True)
 
     workflow: Mapped[Workflow] = relationship("Workflow", back_populates="executions")
     steps: Mapped[list["ExecutionStep"]] = relationship(
@@ -43,6 +51,7 @@ class Execution(Base):
 
 class ExecutionStep(Base):
     __tablename__ = "execution_steps"
+    __table_args__ = (Index("ix_execution_steps_execution_started", "execution_id", "started_at"),)
 
     id: Mapped[str] = mapped_column(String, primary_key=True)
     execution_id: Mapped[str] = mapped_column(String, ForeignKey("executions.id"))
@@ -52,6 +61,8 @@ class ExecutionStep(Base):
     finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     input_json: Mapped[str | None] = mapped_column(Text, nullable=True)
     output_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    input_hash: Mapped[str | None] = mapped_column(String, nullable=True)
+    output_hash: Mapped[str | None] = mapped_column(String, nullable=True)
     error: Mapped[str | None] = mapped_column(String, nullable=True)
 
     execution: Mapped[Execution] = relationship("Execution", back_populates="steps")
@@ -67,3 +78,35 @@ class WebhookEndpoint(Base):
     node_id: Mapped[str] = mapped_column(String)
 
     workflow: Mapped[Workflow] = relationship("Workflow", back_populates="webhooks")
+
+
+class PayloadBlob(Base):
+    __tablename__ = "payload_blobs"
+
+    hash: Mapped[str] = mapped_column(String, primary_key=True)
+    data: Mapped[bytes] = mapped_column(LargeBinary)
+    size: Mapped[int] = mapped_column(Integer)
+    truncated: Mapped[bool] = mapped_column(Boolean, default=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class JobLease(Base):
+    __tablename__ = "job_leases"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    owner: Mapped[str] = mapped_column(String)
+    expires_at: Mapped[datetime] = mapped_column(DateTime)
+
+
+class PendingExecution(Base):
+    __tablename__ = "pending_executions"
+    __table_args__ = (Index("ix_pending_executions_lease", "lease_expires_at", "created_at"),)
+
+    execution_id: Mapped[str] = mapped_column(String, ForeignKey("executions.id"), primary_key=True)
+    workflow_id: Mapped[str] = mapped_column(String)
+    trigger: Mapped[str] = mapped_column(String)
+    items_json: Mapped[str] = mapped_column(Text)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    lease_owner: Mapped[str | None] = mapped_column(String, nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
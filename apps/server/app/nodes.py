@@ -2,11 +2,18 @@ from __future__ import annotations
 
 import base64
 import json
-import multiprocessing
+import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any, Callable
 
-import httpx
+from .config import settings
+from .http_cache import CACHEABLE_METHODS, cache_key, response_cache
+from .http_pool import http_pool
+from .predicates import OPERATORS, compile_condition, compile_path, compile_setter, partition
+from .sandbox import sandbox_pool
+from .tracing import bind
 
 Items = list[dict[str, Any]]
 
@@ -57,6 +64,21 @@ NODE_DEFINITIONS = [
                 "default": "POST",
                 "description": "HTTP method.",
             },
+            {
+                "name": "batchMaxItems",
+                "type": "number",
+                "description": "Merge events into one execution of up to N items.",
+            },
+            {
+                "name": "batchMaxWaitMs",
+                "type": "number",
+                "description": "Longest time an event waits for its batch to fill.",
+            },
+            {
+                "name": "idempotencyHeader",
+                "type": "string",
+                "description": "Header whose value deduplicates retried deliveries.",
+            },
         ],
     ),
     NodeDefinition(
@@ -73,6 +95,30 @@ NODE_DEFINITIONS = [
             {"name": "authUsername", "type": "string"},
             {"name": "authPassword", "type": "string"},
             {"name": "authToken", "type": "string"},
+            {"name": "timeout", "type": "number", "description": "Timeout in seconds."},
+            {
+                "name": "mode",
+                "type": "string",
+                "default": "once",
+                "description": "once | perItem ({{field}} templates read from each item).",
+            },
+            {
+                "name": "concurrency",
+                "type": "number",
+                "default": 1,
+                "description": "Parallel requests in perItem mode.",
+            },
+            {
+                "name": "batchSize",
+                "type": "number",
+                "description": "Send N items per request body in perItem mode.",
+            },
+            {
+                "name": "cache",
+                "type": "boolean",
+                "description": "Cache GET responses and revalidate with ETag/Last-Modified.",
+            },
+            {"name": "cacheTtl", "type": "number", "description": "Cache lifetime in seconds."},
         ],
     ),
     NodeDefinition(
@@ -85,7 +131,13 @@ NODE_DEFINITIONS = [
                 "type": "string",
                 "required": True,
                 "description": "Python: lambda items: items",
-            }
+            },
+            {
+                "name": "mode",
+                "type": "string",
+                "default": "all",
+                "description": "all | perItem (items are independent, so streaming runs may pass them in chunks).",
+            },
         ],
     ),
     NodeDefinition(
@@ -97,81 +149,89 @@ NODE_DEFINITIONS = [
             {
                 "name": "field",
                 "type": "string",
-                "required": True,
                 "description": "Field to check (dot notation).",
             },
             {
                 "name": "operator",
                 "type": "string",
                 "default": "equals",
-                "description": "equals | notEquals | exists",
+                "description": " | ".join(OPERATORS),
             },
             {"name": "value", "type": "string", "description": "Value to compare."},
+            {
+                "name": "conditions",
+                "type": "json",
+                "description": "List of {field, operator, value} or nested {combine, conditions} groups.",
+            },
+            {
+                "name": "combine",
+                "type": "string",
+                "default": "and",
+                "description": "and | or (how conditions are combined).",
+            },
         ],
     ),
     NodeDefinition(
         type="set",
         label="Set",
         description="Set or rename fields.",
-        params=[{"name": "fields", "type": "json", "description": "Fields to set."}],
+        params=[
+            {
+                "name": "fields",
+                "type": "json",
+                "description": "Fields to set (dotted keys write nested fields).",
+            }
+        ],
+    ),
+    NodeDefinition(
+        type="merge",
+        label="Merge",
+        description="Combine the items of several inputs.",
+        params=[
+            {
+                "name": "mode",
+                "type": "string",
+                "default": "append",
+                "description": "append | zip | joinByKey",
+            },
+            {
+                "name": "key",
+                "type": "string",
+                "description": "Field to join on (dot notation, joinByKey only).",
+            },
+            {
+                "name": "joinType",
+                "type": "string",
+                "default": "inner",
+                "description": "inner | left (joinByKey only).",
+            },
+            {
+                "name": "includeUnpaired",
+                "type": "boolean",
+                "description": "Keep items without a partner (zip only).",
+            },
+        ],
     ),
 ]
 
 
 class NodeContext:
-    def __init__(self) -> None:
+    def __init__(self, inputs: list[Items] | None = None) -> None:
         self.logs: list[str] = []
+        self.inputs: list[Items] = inputs or []
 
     def log(self, message: str) -> None:
         self.logs.append(message)
 
 
 def _get_by_path(item: dict[str, Any], path: str) -> Any:
-    if not path:
-        return None
-    current: Any = item
-    for key in path.split("."):
-        if isinstance(current, dict):
-            current = current.get(key)
-        else:
-            return None
-    return current
-
-
-def _run_code(code: str, items: Items, result_queue: multiprocessing.Queue) -> None:
-    def safe_print(*args: Any) -> None:
-        result_queue.put({"type": "log", "value": " ".join(map(str, args))})
-
-    safe_builtins = {"len": len, "range": range, "min": min, "max": max}
-    local_vars: dict[str, Any] = {}
-    try:
-        fn = eval(code, {"__builtins__": safe_builtins, "print": safe_print})
-        output = fn(items)
-        result_queue.put({"type": "result", "value": output})
-    except Exception as exc:  # noqa: BLE001
-        result_queue.put({"type": "error", "value": str(exc)})
+    return compile_path(path)(item)
 
 
 def _execute_code_node(code: str, items: Items, context: NodeContext) -> Items:
-    result_queue: multiprocessing.Queue = multiprocessing.Queue()
-    process = multiprocessing.Process(target=_run_code, args=(code, items, result_queue))
-    process.start()
-    process.join(timeout=2)
-    if process.is_alive():
-        process.terminate()
-        process.join()
-        raise RuntimeError("Code node timed out")
-
-    output: Items | None = None
-    while not result_queue.empty():
-        message = result_queue.get()
-        if message["type"] == "log":
-            context.log(message["value"])
-        if message["type"] == "error":
-            raise RuntimeError(message["value"])
-        if message["type"] == "result":
-            output = message["value"]
-
+    output, logs = sandbox_pool.run(code, items)
+    for message in logs:
+        context.log(message)
     if not isinstance(output, list):
         raise RuntimeError("Code node must return a list of items")
     return output
@@ -180,15 +240,36 @@ def _execute_code_node(code: str, items: Items, context: NodeContext) -> Items:
 NodeHandler = Callable[[dict[str, Any], Items, NodeContext], dict[str, Any]]
 
 
-def handle_http_request(params: dict[str, Any], _items: Items, _ctx: NodeContext) -> dict[str, Any]:
-    url = str(params.get("url") or "")
-    if not url:
-        raise ValueError("HTTP Request node requires url")
-    method = str(params.get("method", "GET")).upper()
-    headers = params.get("headers") or {}
-    query = params.get("query") or {}
-    body = params.get("body")
+_TEMPLATE_PATTERN = re.compile(r"\{\{\s*([\w.$-]+)\s*\}\}")
 
+
+def _render_template(value: Any, item: dict[str, Any]) -> Any:
+    if isinstance(value, str):
+        whole = _TEMPLATE_PATTERN.fullmatch(value.strip())
+        if whole:
+            return _get_by_path(item, whole.group(1))
+        if "{{" not in value:
+            return value
+        return _TEMPLATE_PATTERN.sub(
+            lambda match: _stringify(_get_by_path(item, match.group(1))), value
+        )
+    if isinstance(value, dict):
+        return {key: _render_template(inner, item) for key, inner in value.items()}
+    if isinstance(value, list):
+        return [_render_template(inner, item) for inner in value]
+    return value
+
+
+def _stringify(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+
+def _http_headers(params: dict[str, Any]) -> dict[str, Any]:
+    headers = dict(params.get("headers") or {})
     if params.get("authType") == "basic":
         token = base64.b64encode(
             f"{params.get('authUsername', '')}:{params.get('authPassword', '')}".encode()
@@ -196,21 +277,112 @@ def handle_http_request(params: dict[str, Any], _items: Items, _ctx: NodeContext
         headers["Authorization"] = f"Basic {token}"
     if params.get("authType") == "bearer":
         headers["Authorization"] = f"Bearer {params.get('authToken', '')}"
+    return headers
 
-    with httpx.Client() as client:
-        response = client.request(method, url, headers=headers, params=query, json=body)
 
+def _send_http_request(
+    method: str,
+    url: str,
+    headers: dict[str, Any],
+    query: dict[str, Any],
+    body: Any,
+    timeout: float | None,
+) -> dict[str, Any]:
+    if not url:
+        raise ValueError("HTTP Request node requires url")
+    response = http_pool.request(method, url, timeout=timeout, headers=headers, params=query, json=body)
     return {
-        "default": [
-            {
-                "status": response.status_code,
-                "data": response.json() if response.content else None,
-                "headers": dict(response.headers),
-            }
-        ]
+        "status": response.status_code,
+        "data": response.json() if response.content else None,
+        "headers": dict(response.headers),
     }
 
 
+def _int_param(params: dict[str, Any], name: str, default: int) -> int:
+    value = params.get(name)
+    if value in (None, ""):
+        return default
+    return max(0, int(value))
+
+
+def handle_http_request(params: dict[str, Any], items: Items, ctx: NodeContext) -> dict[str, Any]:
+    url = str(params.get("url") or "")
+    if not url:
+        raise ValueError("HTTP Request node requires url")
+    method = str(params.get("method", "GET")).upper()
+    headers = _http_headers(params)
+    query = params.get("query") or {}
+    body = params.get("body")
+    timeout = float(params["timeout"]) if params.get("timeout") not in (None, "") else None
+    cache_ttl = None
+    if params.get("cache") and method in CACHEABLE_METHODS:
+        cache_ttl = float(params.get("cacheTtl") or settings.http_cache_default_ttl)
+    outcomes: list[str] = []
+
+    def fetch(
+        target: str, request_headers: dict[str, Any], request_query: dict[str, Any], request_body: Any
+    ) -> dict[str, Any]:
+        if cache_ttl is None:
+            return _send_http_request(method, target, request_headers, request_query, request_body, timeout)
+        result, outcome = response_cache.fetch(
+            cache_key(method, target, request_headers, request_query),
+            cache_ttl,
+            lambda validators: _send_http_request(
+                method, target, {**request_headers, **validators}, request_query, request_body, timeout
+            ),
+        )
+        outcomes.append(outcome)
+        return result
+
+    if params.get("mode") != "perItem":
+        result = fetch(url, headers, query, body)
+        _log_cache_outcomes(ctx, outcomes)
+        return {"default": [result]}
+
+    batch_size = _int_param(params, "batchSize", 0)
+    concurrency = max(1, _int_param(params, "concurrency", 1))
+    if batch_size:
+        groups = [items[index : index + batch_size] for index in range(0, len(items), batch_size)]
+    else:
+        groups = [[item] for item in items]
+
+    def send(group: Items) -> dict[str, Any]:
+        first = group[0]
+        if batch_size:
+            group_body = [_render_template(body, item) if body is not None else item for item in group]
+        else:
+            group_body = _render_template(body, first)
+        try:
+            return fetch(
+                _render_template(url, first),
+                _render_template(headers, first),
+                _render_template(query, first),
+                group_body,
+            )
+        except Exception as exc:  # noqa: BLE001
+            return {"error": str(exc), "item": first if not batch_size else None}
+
+    if concurrency == 1 or len(groups) <= 1:
+        results = [send(group) for group in groups]
+    else:
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(groups))) as pool:
+            results = list(pool.map(bind(send), groups))
+
+    failures = sum(1 for result in results if "error" in result)
+    if failures:
+        ctx.log(f"{failures} of {len(results)} requests failed")
+    _log_cache_outcomes(ctx, outcomes)
+    return {"default": results}
+
+
+def _log_cache_outcomes(ctx: NodeContext, outcomes: list[str]) -> None:
+    if outcomes:
+        ctx.log(
+            f"HTTP cache: {outcomes.count('hit')} hits, {outcomes.count('miss')} misses, "
+            f"{outcomes.count('revalidated')} revalidated"
+        )
+
+
 def handle_code(params: dict[str, Any], items: Items, ctx: NodeContext) -> dict[str, Any]:
     code = str(params.get("code") or "")
     if not code:
@@ -220,26 +392,73 @@ def handle_code(params: dict[str, Any], items: Items, ctx: NodeContext) -> dict[
 
 
 def handle_if(params: dict[str, Any], items: Items, _ctx: NodeContext) -> dict[str, Any]:
-    field = str(params.get("field") or "")
-    operator = str(params.get("operator") or "equals")
-    value = params.get("value")
-    truthy: Items = []
-    falsy: Items = []
-    for item in items:
-        field_value = _get_by_path(item, field)
-        if operator == "exists":
-            result = field_value is not None
-        elif operator == "notEquals":
-            result = field_value != value
-        else:
-            result = field_value == value
-        (truthy if result else falsy).append(item)
+    truthy, falsy = partition(compile_condition(params), items)
     return {"outputs": {"true": truthy, "false": falsy}}
 
 
 def handle_set(params: dict[str, Any], items: Items, _ctx: NodeContext) -> dict[str, Any]:
     fields = params.get("fields") or {}
-    return {"default": [{**item, **fields} for item in items]}
+    nested = [(compile_setter(key), value) for key, value in fields.items() if "." in key]
+    if not nested:
+        return {"default": [{**item, **fields} for item in items]}
+    flat = {key: value for key, value in fields.items() if "." not in key}
+    output: Items = []
+    for item in items:
+        updated = {**item, **flat}
+        for set_path, value in nested:
+            set_path(updated, value)
+        output.append(updated)
+    return {"default": output}
+
+
+def _merge_zip(inputs: list[Items], include_unpaired: bool) -> Items:
+    if not inputs:
+        return []
+    lengths = [len(node_input) for node_input in inputs]
+    length = max(lengths) if include_unpaired else min(lengths)
+    output: Items = []
+    for index in range(length):
+        merged: dict[str, Any] = {}
+        for node_input in inputs:
+            if index < len(node_input):
+                merged.update(node_input[index])
+        output.append(merged)
+    return output
+
+
+def _merge_join(inputs: list[Items], key: str, join_type: str) -> Items:
+    if not key:
+        raise ValueError("Merge node requires key for joinByKey")
+    if not inputs:
+        return []
+    output = inputs[0]
+    for right in inputs[1:]:
+        index: dict[str, Items] = {}
+        for item in right:
+            value = _get_by_path(item, key)
+            if value is not None:
+                index.setdefault(json.dumps(value, sort_keys=True), []).append(item)
+        joined: Items = []
+        for item in output:
+            value = _get_by_path(item, key)
+            matches = index.get(json.dumps(value, sort_keys=True), []) if value is not None else []
+            if matches:
+                joined.extend({**item, **match} for match in matches)
+            elif join_type == "left":
+                joined.append(item)
+        output = joined
+    return output
+
+
+def handle_merge(params: dict[str, Any], items: Items, ctx: NodeContext) -> dict[str, Any]:
+    mode = str(params.get("mode") or "append")
+    inputs = ctx.inputs or [items]
+    if mode == "zip":
+        return {"default": _merge_zip(inputs, bool(params.get("includeUnpaired")))}
+    if mode == "joinByKey":
+        join_type = str(params.get("joinType") or "inner")
+        return {"default": _merge_join(inputs, str(params.get("key") or ""), join_type)}
+    return {"default": [item for node_input in inputs for item in node_input]}
 
 
 NODE_HANDLERS: dict[str, NodeHandler] = {
@@ -250,9 +469,20 @@ NODE_HANDLERS: dict[str, NodeHandler] = {
     "code": handle_code,
     "if": handle_if,
     "set": handle_set,
+    "merge": handle_merge,
 }
 
 
+STREAMING_NODE_TYPES = {"manualTrigger", "cronTrigger", "webhookTrigger", "if", "set"}
+
+
+def supports_streaming(node_type: str, params: dict[str, Any]) -> bool:
+    if node_type in STREAMING_NODE_TYPES:
+        return True
+    return node_type in ("httpRequest", "code") and params.get("mode") == "perItem"
+
+
+@lru_cache(maxsize=1)
 def serialize_node_definitions() -> list[dict[str, Any]]:
     return [
         {
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from .blobs import encode_payload, store_payloads
+from .config import settings
+from .events import count_items
+from .metrics import timed_commit
+from .models import ExecutionStep
+
+PERSISTENCE_LEVELS = ("full", "outputs-only", "errors-only", "none")
+
+
+def resolve_persistence_level(workflow_settings: dict[str, Any]) -> str:
+    level = workflow_settings.get("persistence") or settings.step_persistence
+    if level not in PERSISTENCE_LEVELS:
+        raise ValueError(f"Unknown persistence level {level}")
+    return level
+
+
+@dataclass
+class StepRecord:
+    node_id: str
+    items: Any
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    started_at: datetime = field(default_factory=datetime.utcnow)
+
+
+class StepRecorder:
+    def __init__(
+        self,
+        db: Session,
+        execution_id: str,
+        level: str,
+        flush_interval_ms: int,
+        publish: Callable[..., None] | None = None,
+    ) -> None:
+        self.db = db
+        self.execution_id = execution_id
+        self.level = level
+        self.flush_interval = flush_interval_ms / 1000
+        self.publish = publish
+        self._rows: list[dict[str, Any]] = []
+        self._blobs: list[dict[str, Any]] = []
+        self._last_flush = time.monotonic()
+        self.writes = 0
+
+    def start(self, node_id: str, items: Any) -> StepRecord:
+        record = StepRecord(node_id=node_id, items=items)
+        if self.publish:
+            self.publish("step.started", stepId=record.id, nodeId=node_id, items=count_items(items))
+        return record
+
+    def succeed(self, record: StepRecord, output: Any, logs: list[str]) -> None:
+        if self.publish:
+            self.publish(
+                "step.finished",
+                stepId=record.id,
+                nodeId=record.node_id,
+                status="success",
+                items=count_items(output),
+            )
+        if self.level in ("errors-only", "none"):
+            return
+        self._rows.append(
+            self._row(
+                record,
+                status="success",
+                input_hash=self._blob(record.items) if self.level == "full" else None,
+                output_hash=self._blob(output),
+                error=json.dumps({"logs": logs}) if logs else None,
+            )
+        )
+        self.maybe_flush()
+
+    def fail(self, record: StepRecord, error: str) -> None:
+        if self.publish:
+            self.publish("step.finished", stepId=record.id, nodeId=record.node_id, status="failed", error=error)
+        if self.level == "none":
+            return
+        self._rows.append(
+            self._row(
+                record,
+                status="failed",
+                input_hash=self._blob(record.items) if self.level in ("full", "errors-only") else None,
+                output_hash=None,
+                error=error,
+            )
+        )
+
+    def maybe_flush(self) -> None:
+        if self._rows and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self, commit: bool = True) -> None:
+        self._last_flush = time.monotonic()
+        if not self._rows:
+            return
+        rows, self._rows = self._rows, []
+        blobs, self._blobs = self._blobs, []
+        store_payloads(self.db, blobs)
+        self.db.execute(insert(ExecutionStep), rows)
+        self.writes += 1
+        if commit:
+            timed_commit(self.db)
+
+    def _blob(self, value: Any) -> str:
+        digest, row = encode_payload(value)
+        self._blobs.append(row)
+        return digest
+
+    def _row(self, record: StepRecord, **values: Any) -> dict[str, Any]:
+        return {
+            "id": record.id,
+            "execution_id": self.execution_id,
+            "node_id": record.node_id,
+            "started_at": record.started_at,
+            "finished_at": datetime.utcnow(),
+            **values,
+        }
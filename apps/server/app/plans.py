@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from .config import settings
+from .db import SessionLocal
+from .models import Workflow
+from .nodes import NODE_HANDLERS, NodeHandler, supports_streaming
+
+TRIGGER_TYPES = {"manualTrigger", "cronTrigger", "webhookTrigger"}
+
+
+@dataclass
+class PlanNode:
+    id: str
+    type: str
+    handler: NodeHandler | None
+    params: dict[str, Any]
+    outgoing: list[dict[str, Any]] = field(default_factory=list)
+    input_keys: list[str] = field(default_factory=list)
+    streamable: bool = False
+
+
+@dataclass
+class ExecutionPlan:
+    workflow_id: str
+    updated_at: datetime | None
+    workflow: dict[str, Any]
+    nodes: dict[str, PlanNode]
+    triggers: list[str]
+    order: list[str]
+    position: dict[str, int]
+    waiting_on: dict[str, int]
+    settings: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+
+def workflow_to_dict(workflow: Workflow) -> dict[str, Any]:
+    return {
+        "id": workflow.id,
+        "name": workflow.name,
+        "active": workflow.active,
+        "nodes": json.loads(workflow.nodes_json),
+        "edges": json.loads(workflow.edges_json),
+        "settings": json.loads(workflow.settings_json or "{}"),
+        "createdAt": workflow.created_at,
+        "updatedAt": workflow.updated_at,
+    }
+
+
+def topological_order(node_ids: list[str], edges: list[dict[str, Any]]) -> list[str]:
+    known = set(node_ids)
+    indegree = {node_id: 0 for node_id in node_ids}
+    adjacency: dict[str, list[str]] = {}
+    for edge in edges:
+        if edge["source"] not in known or edge["target"] not in known:
+            continue
+        adjacency.setdefault(edge["source"], []).append(edge["target"])
+        indegree[edge["target"]] += 1
+
+    ready = [node_id for node_id in node_ids if indegree[node_id] == 0]
+    order: list[str] = []
+    while ready:
+        node_id = ready.pop()
+        order.append(node_id)
+        for target in adjacency.get(node_id, []):
+            indegree[target] -= 1
+            if indegree[target] == 0:
+                ready.append(target)
+    if len(order) != len(node_ids):
+        raise RuntimeError("Workflow graph contains a cycle")
+    return order
+
+
+def compile_plan(workflow: dict[str, Any]) -> ExecutionPlan:
+    nodes = {
+        node["id"]: PlanNode(
+            id=node["id"],
+            type=node["type"],
+            handler=NODE_HANDLERS.get(node["type"]),
+            params=(node.get("data") or {}).get("params") or {},
+        )
+        for node in workflow["nodes"]
+    }
+    for node in nodes.values():
+        node.streamable = supports_streaming(node.type, node.params)
+    edges = [edge for edge in workflow["edges"] if edge["source"] in nodes and edge["target"] in nodes]
+    for edge in edges:
+        nodes[edge["source"]].outgoing.append(edge)
+        # Inputs are keyed by target handle (or source node) in edge order, so a node
+        # sees each upstream output exactly once and in a deterministic order.
+        input_key = edge.get("targetHandle") or edge["source"]
+        target = nodes[edge["target"]]
+        if input_key not in target.input_keys:
+            target.input_keys.append(input_key)
+
+    triggers = [node_id for node_id, node in nodes.items() if node.type in TRIGGER_TYPES]
+    plan = ExecutionPlan(
+        workflow_id=workflow["id"],
+        updated_at=workflow.get("updatedAt"),
+        workflow=workflow,
+        nodes=nodes,
+        triggers=triggers,
+        order=[],
+        position={},
+        waiting_on={},
+        settings=workflow.get("settings") or {},
+    )
+    try:
+        if not triggers:
+            raise RuntimeError("Workflow has no trigger node")
+        plan.order = topological_order(list(nodes), edges)
+    except RuntimeError as exc:
+        plan.error = str(exc)
+        return plan
+    plan.position = {node_id: index for index, node_id in enumerate(plan.order)}
+
+    reachable: set[str] = set()
+    stack = list(triggers)
+    while stack:
+        node_id = stack.pop()
+        if node_id in reachable:
+            continue
+        reachable.add(node_id)
+        stack.extend(edge["target"] for edge in nodes[node_id].outgoing)
+
+    # A node becomes ready once every incoming edge from a reachable node has delivered.
+    plan.waiting_on = {node_id: 0 for node_id in reachable}
+    for edge in edges:
+        if edge["source"] in reachable:
+            plan.waiting_on[edge["target"]] += 1
+    return plan
+
+
+class PlanCache:
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._plans: OrderedDict[str, ExecutionPlan] = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by invalidate(), so a get() that read the row before an update cannot
+        # put its now-stale plan back afterwards.
+        self._generations: dict[str, int] = {}
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def cached(self, workflow_id: str) -> ExecutionPlan | None:
+        with self._lock:
+            plan = self._plans.get(workflow_id)
+            if plan is not None:
+                self._plans.move_to_end(workflow_id)
+                self._hits += 1
+            return plan
+
+    def get(self, workflow_id: str, updated_at: datetime | None = None) -> ExecutionPlan | None:
+        with self._lock:
+            plan = self._plans.get(workflow_id)
+            if plan is not None and (updated_at is None or plan.updated_at == updated_at):
+                self._plans.move_to_end(workflow_id)
+                self._hits += 1
+                return plan
+            self._misses += 1
+            generation = self._generations.get(workflow_id, 0)
+        with SessionLocal() as db:
+            workflow = db.query(Workflow).filter(Workflow.id == workflow_id).first()
+            if not workflow:
+                return None
+            return self.put(workflow_to_dict(workflow), generation)
+
+    def fresh(self, workflow_id: str) -> ExecutionPlan | None:
+        """get() checked against the row's updated_at, so edits made by other processes are seen."""
+        with SessionLocal() as db:
+            updated_at = db.query(Workflow.updated_at).filter(Workflow.id == workflow_id).scalar()
+        if updated_at is None:
+            self.invalidate(workflow_id)
+            return None
+        return self.get(workflow_id, updated_at)
+
+    def put(self, workflow: dict[str, Any], generation: int | None = None) -> ExecutionPlan:
+        plan = compile_plan(workflow)
+        with self._lock:
+            if generation is not None and generation != self._generations.get(plan.workflow_id, 0):
+                # Invalidated while the row was being read: use the plan once, do not cache it.
+                return plan
+            self._plans[plan.workflow_id] = plan
+            self._plans.move_to_end(plan.workflow_id)
+            while len(self._plans) > self.max_size:
+                self._plans.popitem(last=False)
+        return plan
+
+    def invalidate(self, workflow_id: str) -> None:
+        with self._lock:
+            self._generations[workflow_id] = self._generations.get(workflow_id, 0) + 1
+            if self._plans.pop(workflow_id, None) is not None:
+                self._invalidations += 1
+
+    def evict_stale(self, versions: dict[str, datetime]) -> None:
+        """Drop plans whose workflow was edited or deleted, given every workflow's updated_at."""
+        with self._lock:
+            stale = [
+                workflow_id
+                for workflow_id, plan in self._plans.items()
+                if versions.get(workflow_id) != plan.updated_at
+            ]
+            for workflow_id in stale:
+                del self._plans[workflow_id]
+                self._generations[workflow_id] = self._generations.get(workflow_id, 0) + 1
+            self._invalidations += len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+            self._generations.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._plans),
+                "maxSize": self.max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hitRatio": round(self._hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self._invalidations,
+            }
+
+
+plan_cache = PlanCache(settings.plan_cache_size)
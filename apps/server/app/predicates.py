@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import json
+import re
+from functools import lru_cache
+from typing import Any, Callable, Iterable
+
+Accessor = Callable[[Any], Any]
+Predicate = Callable[[dict[str, Any]], bool]
+
+
+@lru_cache(maxsize=4096)
+def compile_path(path: str) -> Accessor:
+    if not path:
+        return lambda _item: None
+    keys = tuple(path.split("."))
+    if len(keys) == 1:
+        (key,) = keys
+
+        def get_one(item: Any) -> Any:
+            return item.get(key) if isinstance(item, dict) else None
+
+        return get_one
+
+    def get_path(item: Any) -> Any:
+        current = item
+        for key in keys:
+            if not isinstance(current, dict):
+                return None
+            current = current.get(key)
+        return current
+
+    return get_path
+
+
+@lru_cache(maxsize=4096)
+def compile_setter(path: str) -> Callable[[dict[str, Any], Any], None]:
+    *parents, leaf = path.split(".")
+
+    def set_path(item: dict[str, Any], value: Any) -> None:
+        # Nested dicts are copied on the way down so input items are never mutated.
+        current = item
+        for key in parents:
+            child = current.get(key)
+            child = dict(child) if isinstance(child, dict) else {}
+            current[key] = child
+            current = child
+        current[leaf] = value
+
+    return set_path
+
+
+def _number(value: Any) -> float | None:
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _members(value: Any) -> list[Any]:
+    if isinstance(value, (list, tuple, set)):
+        return list(value)
+    if isinstance(value, str):
+        return [part.strip() for part in value.split(",")]
+    return [value]
+
+
+def _compare(value: Any, test: Callable[[float, float], bool]) -> Callable[[Any], bool]:
+    expected = _number(value)
+    if expected is None:
+        raise ValueError(f"Numeric comparison needs a number, got {value!r}")
+
+    def compare(actual: Any) -> bool:
+        number = _number(actual)
+        return number is not None and test(number, expected)
+
+    return compare
+
+
+def _contains(value: Any) -> Callable[[Any], bool]:
+    def contains(actual: Any) -> bool:
+        if isinstance(actual, str):
+            return str(value) in actual
+        if isinstance(actual, (list, tuple, dict)):
+            return value in actual
+        return False
+
+    return contains
+
+
+def _member_of(value: Any) -> Callable[[Any], bool]:
+    members = _members(value)
+    try:
+        lookup: Any = frozenset(members)
+    except TypeError:
+        lookup = members
+
+    def member_of(actual: Any) -> bool:
+        try:
+            return actual in lookup
+        except TypeError:
+            return False
+
+    return member_of
+
+
+def _regex(value: Any) -> Callable[[Any], bool]:
+    pattern = re.compile(str(value or ""))
+    return lambda actual: actual is not None and pattern.search(str(actual)) is not None
+
+
+def _negate(test: Callable[[Any], bool]) -> Callable[[Any], bool]:
+    return lambda actual: not test(actual)
+
+
+OPERATORS: dict[str, Callable[[Any], Callable[[Any], bool]]] = {
+    "equals": lambda value: lambda actual: actual == value,
+    "notEquals": lambda value: lambda actual: actual != value,
+    "exists": lambda _value: lambda actual: actual is not None,
+    "notExists": lambda _value: lambda actual: actual is None,
+    "gt": lambda value: _compare(value, lambda a, b: a > b),
+    "gte": lambda value: _compare(value, lambda a, b: a >= b),
+    "lt": lambda value: _compare(value, lambda a, b: a < b),
+    "lte": lambda value: _compare(value, lambda a, b: a <= b),
+    "in": _member_of,
+    "notIn": lambda value: _negate(_member_of(value)),
+    "contains": _contains,
+    "notContains": lambda value: _negate(_contains(value)),
+    "regex": _regex,
+}
+
+
+def _compile(spec: dict[str, Any]) -> Predicate:
+    if spec.get("conditions"):
+        parts = [_compile(condition) for condition in spec["conditions"]]
+        combine = str(spec.get("combine") or "and").lower()
+        if combine not in ("and", "or"):
+            raise ValueError(f"Unknown condition combinator {combine}")
+        if len(parts) == 1:
+            return parts[0]
+        if combine == "or":
+            return lambda item: any(part(item) for part in parts)
+        return lambda item: all(part(item) for part in parts)
+
+    operator = str(spec.get("operator") or "equals")
+    factory = OPERATORS.get(operator)
+    if factory is None:
+        raise ValueError(f"Unknown IF operator {operator}")
+    get = compile_path(str(spec.get("field") or ""))
+    test = factory(spec.get("value"))
+    return lambda item: test(get(item))
+
+
+@lru_cache(maxsize=1024)
+def _compile_cached(key: str) -> Predicate:
+    return _compile(json.loads(key))
+
+
+def compile_condition(params: dict[str, Any]) -> Predicate:
+    """Compile IF params (one condition or nested and/or groups) into a predicate.
+
+    Compiled predicates are cached by their JSON form, so cached plans and
+    streamed chunks reuse the same accessors and regexes.
+    """
+    spec = {key: params[key] for key in ("field", "operator", "value", "conditions", "combine") if key in params}
+    return _compile_cached(json.dumps(spec, sort_keys=True, default=str))
+
+
+def partition(predicate: Predicate, items: Iterable[dict[str, Any]]) -> tuple[list[Any], list[Any]]:
+    truthy: list[Any] = []
+    falsy: list[Any] = []
+    keep, drop = truthy.append, falsy.append
+    for item in items:
+        (keep if predicate(item) else drop)(item)
+    return truthy, falsy
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy import delete, or_, select, union
+from sqlalchemy.orm import Session
+
+from .blobs import load_payloads
+from .config import settings
+from .db import SessionLocal
+from .models import Execution, ExecutionStep, PayloadBlob, Workflow
+from .scheduler import is_scheduler_leader, scheduler
+
+logger = logging.getLogger(__name__)
+
+RETENTION_JOB_ID = "retention"
+FINISHED_STATUSES = ("success", "failed", "cancelled")
+BLOB_GRACE_PERIOD = timedelta(hours=1)
+
+
+@dataclass
+class RetentionPolicy:
+    max_age_days: int
+    max_count: int
+    failed_max_age_days: int
+
+    @classmethod
+    def for_workflow(cls, workflow_settings: dict[str, Any]) -> RetentionPolicy:
+        overrides = workflow_settings.get("retention") or {}
+        return cls(
+            max_age_days=int(overrides.get("maxAgeDays", settings.retention_max_age_days)),
+            max_count=int(overrides.get("maxCount", settings.retention_max_count)),
+            failed_max_age_days=int(
+                overrides.get("failedMaxAgeDays", settings.retention_failed_max_age_days)
+            ),
+        )
+
+
+_lock = threading.Lock()
+_last_run: dict[str, Any] = {}
+
+
+def run_retention() -> dict[str, Any]:
+    if not is_scheduler_leader():
+        return {"skipped": True}
+    if not _lock.acquire(blocking=False):
+        return {"skipped": True}
+    try:
+        started = datetime.utcnow()
+        deleted = 0
+        with SessionLocal() as db:
+            workflows = db.query(Workflow.id, Workflow.settings_json).all()
+            for workflow_id, settings_json in workflows:
+                policy = RetentionPolicy.for_workflow(json.loads(settings_json or "{}"))
+                deleted += _prune_workflow(db, workflow_id, policy, started)
+            blobs = _collect_orphan_blobs(db, started)
+            _incremental_vacuum(db)
+        _last_run.update(
+            {
+                "startedAt": started.isoformat(),
+                "durationMs": round((datetime.utcnow() - started).total_seconds() * 1000, 1),
+                "executionsDeleted": deleted,
+                "blobsDeleted": blobs,
+            }
+        )
+        return dict(_last_run)
+    finally:
+        _lock.release()
+
+
+def start_retention() -> None:
+    if settings.retention_interval_minutes <= 0:
+        return
+    scheduler.add_job(
+        run_retention,
+        IntervalTrigger(minutes=settings.retention_interval_minutes),
+        id=RETENTION_JOB_ID,
+        jobstore="system",
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1,
+    )
+
+
+def retention_stats() -> dict[str, Any]:
+    return {"lastRun": dict(_last_run) or None}
+
+
+def _prune_workflow(db: Session, workflow_id: str, policy: RetentionPolicy, now: datetime) -> int:
+    conditions = []
+    if policy.max_age_days > 0:
+        conditions.append(
+            (Execution.status != "failed") & (Execution.started_at < now - timedelta(days=policy.max_age_days))
+        )
+    if policy.failed_max_age_days > 0:
+        conditions.append(
+            (Execution.status == "failed")
+            & (Execution.started_at < now - timedelta(days=policy.failed_max_age_days))
+        )
+    if policy.max_count > 0:
+        # Failures are only pruned by age so they can be kept longer.
+        newest = (
+            select(Execution.id)
+            .where(Execution.workflow_id == workflow_id, Execution.status != "failed")
+            .order_by(Execution.started_at.desc(), Execution.id.desc())
+            .limit(policy.max_count)
+        )
+        conditions.append((Execution.status != "failed") & Execution.id.not_in(newest))
+    if not conditions:
+        return 0
+
+    deleted = 0
+    while True:
+        ids = list(
+            db.scalars(
+                select(Execution.id)
+                .where(
+                    Execution.workflow_id == workflow_id,
+                    Execution.status.in_(FINISHED_STATUSES),
+                    or_(*conditions),
+                )
+                .limit(settings.retention_chunk_size)
+            )
+        )
+        if not ids:
+            return deleted
+        if settings.retention_archive_dir:
+            _archive(db, ids, now)
+        db.execute(delete(ExecutionStep).where(ExecutionStep.execution_id.in_(ids)))
+        db.execute(delete(Execution).where(Execution.id.in_(ids)))
+        db.commit()
+        deleted += len(ids)
+
+
+def _archive(db: Session, execution_ids: list[str], now: datetime) -> None:
+    executions = db.query(Execution).filter(Execution.id.in_(execution_ids)).all()
+    steps = (
+        db.query(ExecutionStep)
+        .filter(ExecutionStep.execution_id.in_(execution_ids))
+        .order_by(ExecutionStep.started_at.asc())
+        .all()
+    )
+    payloads = load_payloads(db, {step.input_hash for step in steps} | {step.output_hash for step in steps})
+    steps_by_execution: dict[str, list[dict[str, Any]]] = {}
+    for step in steps:
+        steps_by_execution.setdefault(step.execution_id, []).append(
+            {
+                "id": step.id,
+                "nodeId": step.node_id,
+                "status": step.status,
+                "startedAt": step.started_at.isoformat(),
+                "finishedAt": step.finished_at.isoformat() if step.finished_at else None,
+                "input": payloads.get(step.input_hash) if step.input_hash else _legacy(step.input_json),
+                "output": payloads.get(step.output_hash) if step.output_hash else _legacy(step.output_json),
+                "error": step.error,
+            }
+        )
+    archive_dir = Path(settings.retention_archive_dir)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    path = archive_dir / f"executions-{now:%Y%m%d}.jsonl.gz"
+    with gzip.open(path, "at", encoding="utf-8") as archive:
+        for execution in executions:
+            record = {
+                "id": execution.id,
+                "workflowId": execution.workflow_id,
+                "status": execution.status,
+                "startedAt": execution.started_at.isoformat(),
+                "finishedAt": execution.finished_at.isoformat() if execution.finished_at else None,
+                "error": execution.error,
+                "steps": steps_by_execution.get(execution.id, []),
+            }
+            archive.write(json.dumps(record) + "\n")
+
+
+def _legacy(value: str | None) -> Any:
+    return json.loads(value) if value else None
+
+
+def _collect_orphan_blobs(db: Session, now: datetime) -> int:
+    referenced = union(
+        select(ExecutionStep.input_hash).where(ExecutionStep.input_hash.is_not(None)),
+        select(ExecutionStep.output_hash).where(ExecutionStep.output_hash.is_not(None)),
+        select(Execution.trace_hash).where(Execution.trace_hash.is_not(None)),
+    )
+    orphaned = (PayloadBlob.created_at < now - BLOB_GRACE_PERIOD, PayloadBlob.hash.not_in(referenced))
+    deleted = 0
+    while True:
+        hashes = list(db.scalars(select(PayloadBlob.hash).where(*orphaned).limit(settings.retention_chunk_size)))
+        if not hashes:
+            return deleted
+        # Checked again in the DELETE: a flush may have reused one of these blobs since the SELECT.
+        result = db.execute(delete(PayloadBlob).where(PayloadBlob.hash.in_(hashes), *orphaned))
+        db.commit()
+        deleted += result.rowcount
+
+
+def _incremental_vacuum(db: Session) -> None:
+    if db.get_bind().dialect.name != "sqlite" or settings.retention_vacuum_pages <= 0:
+        return
+    mode = db.connection().exec_driver_sql("PRAGMA auto_vacuum").scalar()
+    if mode != 2:
+        logger.info("SQLite auto_vacuum is not INCREMENTAL; run VACUUM once to enable it")
+        return
+    db.connection().exec_driver_sql(f"PRAGMA incremental_vacuum({int(settings.retention_vacuum_pages)})")
+    db.commit()
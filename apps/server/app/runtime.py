@@ -1,107 +1,211 @@
 from __future__ import annotations
 
-import json
+import time
 import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime
+from functools import partial
 from typing import Any
 
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import flag_modified
 
+from .blobs import encode_payload, store_payloads
+from .config import settings
+from .events import FINISHED_EVENT, event_bus
+from .metrics import (
+    EXECUTION_SECONDS,
+    EXECUTIONS_TOTAL,
+    NODE_SECONDS,
+    QUEUE_WAIT_SECONDS,
+    metrics,
+    timed_commit,
+)
 from .models import Execution, ExecutionStep
-from .nodes import NODE_HANDLERS, NodeContext, Items
+from .nodes import NodeContext, Items
+from .persistence import StepRecord, StepRecorder, resolve_persistence_level
+from .plans import ExecutionPlan, PlanNode
+from .streaming import StreamingRun, resolve_chunk_size
+from .tracing import ExecutionTrace, activate, bind, deactivate, export_otlp, should_sample, span
 
 
-def execute_workflow(
-    db: Session,
-    workflow: dict[str, Any],
-    initial_items: Items,
-) -> str:
+def create_execution(db: Session, workflow_id: str, status: str = "queued") -> Execution:
     execution = Execution(
         id=str(uuid.uuid4()),
-        workflow_id=workflow["id"],
-        status="running",
+        workflow_id=workflow_id,
+        status=status,
         started_at=datetime.utcnow(),
     )
     db.add(execution)
     db.commit()
+    return execution
+
+
+def _run_node(node: PlanNode, items: Items, inputs: list[Items]) -> tuple[dict[str, Any], NodeContext]:
+    ctx = NodeContext(inputs)
+    with span(node.id, "node", type=node.type, items=len(items)):
+        if not metrics.enabled:
+            return node.handler(node.params, items, ctx), ctx
+        started = time.perf_counter()
+        try:
+            return node.handler(node.params, items, ctx), ctx
+        finally:
+            NODE_SECONDS.observe(time.perf_counter() - started, node.type)
+
 
-    nodes = {node["id"]: node for node in workflow["nodes"]}
-    edges = workflow["edges"]
-    adjacency: dict[str, list[dict[str, Any]]] = {}
-    for edge in edges:
-        adjacency.setdefault(edge["source"], []).append(edge)
-
-    trigger_nodes = [
-        node
-        for node in workflow["nodes"]
-        if node["type"] in {"manualTrigger", "cronTrigger", "webhookTrigger"}
-    ]
-    if not trigger_nodes:
-        raise RuntimeError("Workflow has no trigger node")
-
-    queue: list[str] = []
-    items_by_node: dict[str, Items] = {}
-    for node in trigger_nodes:
-        queue.append(node["id"])
-        items_by_node[node["id"]] = initial_items
+def _store_trace(db: Session, execution: Execution, trace: ExecutionTrace | None) -> None:
+    if trace is None:
+        return
+    trace.finish(status=execution.status)
+    digest, row = encode_payload(trace.to_chrome())
+    store_payloads(db, [row])
+    execution.trace_hash = digest
+    export_otlp(trace)
 
+
+def execute_workflow(
+    db: Session,
+    plan: ExecutionPlan,
+    initial_items: Items,
+    execution_id: str | None = None,
+) -> str:
+    trace = None
+    if should_sample(plan.settings):
+        trace = ExecutionTrace(execution_id or "", plan.workflow_id, settings.trace_max_spans)
+    trace_tokens = activate(trace)
     try:
-        while queue:
-            node_id = queue.pop(0)
-            node = nodes.get(node_id)
-            if not node:
-                continue
-            handler = NODE_HANDLERS.get(node["type"])
-            if not handler:
-                raise RuntimeError(f"No handler for node type {node['type']}")
-
-            items = items_by_node.get(node_id, [])
-            step = ExecutionStep(
-                id=str(uuid.uuid4()),
-                execution_id=execution.id,
-                node_id=node_id,
-                status="running",
-                started_at=datetime.utcnow(),
-                input_json=json.dumps(items),
+        return _execute(db, plan, initial_items, execution_id, trace)
+    finally:
+        deactivate(trace_tokens)
+
+
+def _execute(
+    db: Session,
+    plan: ExecutionPlan,
+    initial_items: Items,
+    execution_id: str | None,
+    trace: ExecutionTrace | None,
+) -> str:
+    started = time.perf_counter()
+    execution = None
+    if execution_id:
+        execution = db.query(Execution).filter(Execution.id == execution_id).first()
+        if execution is None:
+            # Deleted while queued, typically together with its workflow.
+            raise LookupError(f"Execution {execution_id} no longer exists")
+    if execution is None:
+        execution = create_execution(db, plan.workflow_id, status="running")
+    else:
+        if execution.status == "running":
+            # Claimed again after the worker running it died: drop that attempt's steps.
+            db.query(ExecutionStep).filter(ExecutionStep.execution_id == execution.id).delete(
+                synchronize_session=False
             )
-            db.add(step)
-            db.commit()
-
-            ctx = NodeContext()
-            result = handler(node.get("data", {}).get("params", {}), items, ctx)
-            outputs = result.get("outputs")
-            output_default = result.get("default", [])
-
-            step.status = "success"
-            step.finished_at = datetime.utcnow()
-            step.output_json = json.dumps(outputs or output_default)
-            if ctx.logs:
-                step.error = json.dumps({"logs": ctx.logs})
-            db.add(step)
-            db.commit()
-
-            outgoing = adjacency.get(node_id, [])
-            if outputs:
-                for edge in outgoing:
-                    handle = edge.get("sourceHandle") or "default"
-                    items_for_edge = outputs.get(handle, [])
-                    items_by_node.setdefault(edge["target"], []).extend(items_for_edge)
-                    queue.append(edge["target"])
-            else:
-                for edge in outgoing:
-                    items_by_node.setdefault(edge["target"], []).extend(output_default)
-                    queue.append(edge["target"])
+        now = datetime.utcnow()
+        QUEUE_WAIT_SECONDS.observe((now - execution.started_at).total_seconds())
+        execution.status = "running"
+        execution.started_at = now
+        db.add(execution)
+        timed_commit(db)
+    if trace is not None:
+        trace.execution_id = execution.id
+    run_id = execution.id
+    # Kept outside the ORM object, which may be gone if the execution is deleted mid-run.
+    status, error, finished_at = "failed", None, None
+    publish = partial(event_bus.publish, execution_id=run_id, workflow_id=plan.workflow_id)
+    publish("execution.started", status="running", startedAt=execution.started_at)
+
+    inputs_by_node: dict[str, dict[str, Items]] = {
+        node_id: {input_key: [] for input_key in node.input_keys} for node_id, node in plan.nodes.items()
+    }
+    for node_id in plan.triggers:
+        inputs_by_node[node_id]["trigger"] = initial_items
+    waiting_on = dict(plan.waiting_on)
 
+    pool = ThreadPoolExecutor(max_workers=max(1, settings.node_concurrency))
+    running: dict[Future, tuple[str, StepRecord]] = {}
+    recorder = StepRecorder(db, execution.id, "none", settings.step_flush_interval_ms, publish)
+    try:
+        if plan.error:
+            raise RuntimeError(plan.error)
+        recorder.level = resolve_persistence_level(plan.settings)
+        if plan.settings.get("streaming"):
+            StreamingRun(plan, recorder, resolve_chunk_size(plan.settings)).run(initial_items)
+        else:
+            ready = [node_id for node_id, count in waiting_on.items() if count == 0]
+
+            while ready or running:
+                ready.sort(key=plan.position.__getitem__)
+                for node_id in ready:
+                    node = plan.nodes[node_id]
+                    if not node.handler:
+                        raise RuntimeError(f"No handler for node type {node.type}")
+                    inputs = list(inputs_by_node[node_id].values())
+                    items = [item for node_input in inputs for item in node_input]
+                    record = recorder.start(node_id, items)
+                    future = pool.submit(bind(_run_node), node, items, inputs)
+                    running[future] = (node_id, record)
+                ready = []
+
+                done, _ = wait(
+                    running, timeout=recorder.flush_interval or None, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    node_id, record = running.pop(future)
+                    try:
+                        result, ctx = future.result()
+                    except Exception as exc:
+                        recorder.fail(record, str(exc))
+                        raise
+                    outputs = result.get("outputs")
+                    output_default = result.get("default", [])
+                    recorder.succeed(record, outputs or output_default, ctx.logs)
+
+                    for edge in plan.nodes[node_id].outgoing:
+                        if outputs:
+                            handle = edge.get("sourceHandle") or "default"
+                            items_for_edge = outputs.get(handle, [])
+                        else:
+                            items_for_edge = output_default
+                        target = edge["target"]
+                        input_key = edge.get("targetHandle") or node_id
+                        inputs_by_node[target][input_key].extend(items_for_edge)
+                        waiting_on[target] -= 1
+                        if waiting_on[target] == 0:
+                            ready.append(target)
+                recorder.maybe_flush()
+
+        recorder.flush(commit=False)
         execution.status = "success"
+        # Clears a "shut down" error written while the run overran the shutdown timeout; the
+        # attribute is already None in this session, so force the column into the UPDATE.
+        execution.error = None
+        flag_modified(execution, "error")
         execution.finished_at = datetime.utcnow()
+        _store_trace(db, execution, trace)
         db.add(execution)
-        db.commit()
+        timed_commit(db)
+        status, finished_at = execution.status, execution.finished_at
     except Exception as exc:  # noqa: BLE001
+        for future in running:
+            future.cancel()
+        db.rollback()
+        if db.query(Execution.id).filter(Execution.id == run_id).first() is None:
+            # Deleted while running, together with its workflow: there is nothing left to record.
+            status, error = "cancelled", "Execution was deleted"
+            raise LookupError(f"Execution {run_id} was deleted while running") from exc
+        recorder.flush(commit=False)
         execution.status = "failed"
-        execution.error = str(exc)
-        execution.finished_at = datetime.utcnow()
+        execution.error = error = str(exc)
+        execution.finished_at = finished_at = datetime.utcnow()
+        _store_trace(db, execution, trace)
         db.add(execution)
-        db.commit()
+        timed_commit(db)
         raise
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        publish(FINISHED_EVENT, status=status, error=error, finishedAt=finished_at)
+        EXECUTIONS_TOTAL.inc(status)
+        EXECUTION_SECONDS.observe(time.perf_counter() - started, plan.workflow_id)
 
-    return execution.id
+    return run_id
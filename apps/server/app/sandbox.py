@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import multiprocessing
+import pickle
+import queue
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing.connection import Connection
+from typing import Any
+
+from .config import settings
+from .metrics import CODE_RUN_SECONDS, CODE_SPAWN_SECONDS
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+SAFE_BUILTINS = {"len": len, "range": range, "min": min, "max": max}
+COMPILED_CACHE_SIZE = 256
+
+
+def _sandbox_worker(conn: Connection) -> None:
+    compiled: OrderedDict[str, Any] = OrderedDict()
+    while True:
+        try:
+            code_hash, code, items = pickle.loads(conn.recv_bytes())
+        except (EOFError, OSError):
+            return
+        logs: list[str] = []
+        if code is None and code_hash not in compiled:
+            conn.send_bytes(pickle.dumps({"type": "miss"}))
+            continue
+
+        def safe_print(*args: Any) -> None:
+            logs.append(" ".join(map(str, args)))
+
+        try:
+            fn = compiled.get(code_hash)
+            if fn is None:
+                fn = eval(code, {"__builtins__": SAFE_BUILTINS, "print": safe_print})
+                compiled[code_hash] = fn
+                if len(compiled) > COMPILED_CACHE_SIZE:
+                    compiled.popitem(last=False)
+            else:
+                compiled.move_to_end(code_hash)
+                fn.__globals__["print"] = safe_print
+            message = {"type": "result", "value": fn(items), "logs": logs}
+        except Exception as exc:  # noqa: BLE001
+            message = {"type": "error", "value": str(exc), "logs": logs}
+        try:
+            payload = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as exc:  # noqa: BLE001
+            payload = pickle.dumps({"type": "error", "value": f"Unserializable result: {exc}", "logs": logs})
+        conn.send_bytes(payload)
+
+
+class _Worker:
+    def __init__(self, context: Any) -> None:
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_sandbox_worker, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.known: set[str] = set()
+        self.tasks = 0
+
+    def kill(self) -> None:
+        self.conn.close()
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+
+
+class SandboxPool:
+    def __init__(self, size: int, timeout: float, max_tasks_per_worker: int, acquire_timeout: float) -> None:
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.acquire_timeout = acquire_timeout
+        self._context = multiprocessing.get_context("fork")
+        self._idle: queue.LifoQueue[_Worker] = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._spawned = 0
+        self._killed = 0
+        self._closed = False
+
+    def start(self) -> None:
+        with self._lock:
+            self._closed = False
+            missing = self.size - self._spawned
+            self._spawned += missing
+        for _ in range(missing):
+            self._idle.put(self._spawn())
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            worker.kill()
+        with self._lock:
+            self._spawned = 0
+
+    def reset(self) -> None:
+        # Used after fork: the workers belong to the parent process.
+        self._idle = queue.LifoQueue()
+        with self._lock:
+            self._spawned = 0
+
+    def run(self, code: str, items: list[dict[str, Any]]) -> tuple[Any, list[str]]:
+        worker = self._acquire()
+        code_hash = hashlib.sha256(code.encode()).hexdigest()
+        started = time.perf_counter()
+        try:
+            message = self._call(worker, code_hash, None if code_hash in worker.known else code, items)
+            if message["type"] == "miss":
+                message = self._call(worker, code_hash, code, items)
+        except (EOFError, OSError) as exc:
+            self._discard(worker)
+            raise RuntimeError("Code node worker crashed") from exc
+        except pickle.PicklingError:
+            self._release(worker)
+            raise
+        CODE_RUN_SECONDS.observe(time.perf_counter() - started)
+        worker.known.add(code_hash)
+        worker.tasks += 1
+        self._release(worker)
+        if message["type"] == "error":
+            raise RuntimeError(message["value"])
+        return message["value"], message["logs"]
+
+    def _call(self, worker: _Worker, code_hash: str, code: str | None, items: list[dict[str, Any]]) -> dict[str, Any]:
+        with span("code.send", "code", compiled=code is None):
+            worker.conn.send_bytes(pickle.dumps((code_hash, code, items), protocol=pickle.HIGHEST_PROTOCOL))
+        with span("code.run", "code"):
+            ready = worker.conn.poll(self.timeout)
+        if not ready:
+            self._discard(worker)
+            raise RuntimeError("Code node timed out")
+        with span("code.receive", "code"):
+            return pickle.loads(worker.conn.recv_bytes())
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "size": self.size,
+                "idle": self._idle.qsize(),
+                "spawned": self._spawned,
+                "killed": self._killed,
+            }
+
+    def _acquire(self) -> _Worker:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_spawn = self._spawned < self.size
+            if can_spawn:
+                self._spawned += 1
+        if can_spawn:
+            try:
+                return self._spawn()
+            except Exception:
+                with self._lock:
+                    self._spawned -= 1
+                raise
+        try:
+            # Workers that are discarded are replaced into _idle, so waiters always wake up.
+            return self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise RuntimeError(
+                f"Code node pool exhausted: no worker free after {self.acquire_timeout:g}s"
+            ) from None
+
+    def _spawn(self) -> _Worker:
+        started = time.perf_counter()
+        with span("code.spawn", "code"):
+            worker = _Worker(self._context)
+        CODE_SPAWN_SECONDS.observe(time.perf_counter() - started)
+        return worker
+
+    def _release(self, worker: _Worker) -> None:
+        if self.max_tasks_per_worker and worker.tasks >= self.max_tasks_per_worker:
+            self._discard(worker)
+            return
+        self._idle.put(worker)
+
+    def _discard(self, worker: _Worker) -> None:
+        worker.kill()
+        with self._lock:
+            self._killed += 1
+            if self._closed:
+                self._spawned -= 1
+                return
+        # Keep the slot: callers may already be blocked in _acquire waiting for it.
+        try:
+            replacement = self._spawn()
+        except Exception:  # noqa: BLE001
+            logger.exception("Could not replace a code node worker")
+            with self._lock:
+                self._spawned -= 1
+            return
+        self._idle.put(replacement)
+
+
+sandbox_pool = SandboxPool(
+    settings.code_workers,
+    settings.code_timeout,
+    settings.code_worker_max_tasks,
+    settings.code_acquire_timeout,
+)
@@ -1,41 +1,183 @@
 from __future__ import annotations
 
-from collections.abc import Callable
+import logging
+import threading
+from typing import Any
 
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.jobstores.memory import MemoryJobStore
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from sqlalchemy.orm import Session
+from apscheduler.triggers.interval import IntervalTrigger
 
-from .runtime import execute_workflow
+from sqlalchemy import func
 
-scheduler = BackgroundScheduler()
+from .config import settings
+from .db import SessionLocal
+from .dispatcher import dispatcher
+from .governor import AdmissionRejected
+from .leases import PROCESS_OWNER, LeaderLease
+from .models import Workflow
+from .plans import plan_cache, workflow_to_dict
+from .webhooks import webhook_router
 
+logger = logging.getLogger(__name__)
 
-def reschedule_cron(
-    session_factory: Callable[[], Session],
-    workflows: list[dict],
-) -> None:
-    scheduler.remove_all_jobs()
-    for workflow in workflows:
-        if not workflow["active"]:
-            continue
+# Workflow cron jobs live in "default"; housekeeping jobs in "system" survive rescheduling.
+scheduler = BackgroundScheduler(jobstores={"default": MemoryJobStore(), "system": MemoryJobStore()})
+
+_lock = threading.Lock()
+_cron_by_workflow: dict[str, dict[str, str]] = {}
+
+# With several API processes every one schedules the same jobs; only the lease holder runs them.
+LEASE_JOB_ID = "scheduler-lease"
+scheduler_lease = LeaderLease("scheduler", PROCESS_OWNER, settings.scheduler_lease_seconds)
+
+# Webhook routes, cron jobs and compiled plans are per process; this job picks up edits made
+# through the other processes, keyed on the workflow count and the latest updated_at.
+WORKFLOW_SYNC_JOB_ID = "workflow-sync"
+_workflow_fingerprint: tuple[int, Any] | None = None
+
+
+def is_scheduler_leader() -> bool:
+    return not settings.scheduler_leader_election or scheduler_lease.is_leader
+
+
+def cron_job_id(workflow_id: str, node_id: str) -> str:
+    return f"cron:{workflow_id}:{node_id}"
+
+
+def run_cron_workflow(workflow_id: str) -> None:
+    if not is_scheduler_leader():
+        return
+    plan = plan_cache.fresh(workflow_id)
+    if plan is None or not plan.workflow["active"]:
+        return
+    try:
+        dispatcher.submit(plan, [], trigger="cron")
+    except AdmissionRejected as exc:
+        logger.info("Cron run for %s not admitted: %s", workflow_id, exc)
+    except Exception:  # noqa: BLE001
+        logger.exception("Cron run for %s could not be queued", workflow_id)
+
+
+def sync_workflow_cron(workflow: dict[str, Any]) -> None:
+    workflow_id = workflow["id"]
+    wanted: dict[str, str] = {}
+    if workflow["active"]:
         for node in workflow["nodes"]:
             if node["type"] != "cronTrigger":
                 continue
-            cron_expr = node.get("data", {}).get("params", {}).get("cronExpression")
-            if not cron_expr:
+            cron_expr = (node.get("data") or {}).get("params", {}).get("cronExpression")
+            if cron_expr:
+                wanted[cron_job_id(workflow_id, node["id"])] = str(cron_expr).strip()
+
+    with _lock:
+        current = _cron_by_workflow.get(workflow_id, {})
+        for job_id in current.keys() - wanted.keys():
+            _remove_job(job_id)
+        scheduled: dict[str, str] = {}
+        for job_id, cron_expr in wanted.items():
+            if current.get(job_id) == cron_expr:
+                scheduled[job_id] = cron_expr
+                continue
+            try:
+                trigger = CronTrigger.from_crontab(cron_expr)
+            except ValueError:
+                logger.warning("Invalid cron expression %r for %s", cron_expr, job_id)
+                _remove_job(job_id)
                 continue
+            scheduler.add_job(
+                run_cron_workflow,
+                trigger,
+                id=job_id,
+                args=[workflow_id],
+                replace_existing=True,
+                coalesce=True,
+                max_instances=1,
+                misfire_grace_time=settings.cron_misfire_grace_seconds,
+            )
+            scheduled[job_id] = cron_expr
+        if scheduled:
+            _cron_by_workflow[workflow_id] = scheduled
+        else:
+            _cron_by_workflow.pop(workflow_id, None)
+
 
-            def _run_workflow(wf=workflow):
-                with session_factory() as db:
-                    execute_workflow(db, wf, [])
+def remove_workflow_cron(workflow_id: str) -> None:
+    with _lock:
+        for job_id in _cron_by_workflow.pop(workflow_id, {}):
+            _remove_job(job_id)
+
+
+def sync_workflows() -> bool:
+    """Reload webhook routes and cron jobs if workflows changed in the database; True if so."""
+    global _workflow_fingerprint
+    with SessionLocal() as db:
+        fingerprint = tuple(db.query(func.count(Workflow.id), func.max(Workflow.updated_at)).one())
+        if fingerprint == _workflow_fingerprint:
+            return False
+        workflows = [workflow_to_dict(workflow) for workflow in db.query(Workflow).all()]
+        webhook_router.load(db)
+    for workflow in workflows:
+        sync_workflow_cron(workflow)
+    known = {workflow["id"] for workflow in workflows}
+    with _lock:
+        removed = [workflow_id for workflow_id in _cron_by_workflow if workflow_id not in known]
+    for workflow_id in removed:
+        remove_workflow_cron(workflow_id)
+    plan_cache.evict_stale({workflow["id"]: workflow["updatedAt"] for workflow in workflows})
+    _workflow_fingerprint = fingerprint
+    return True
 
-            scheduler.add_job(_run_workflow, CronTrigger.from_crontab(cron_expr))
 
+def load_cron_jobs(workflows: list[dict[str, Any]]) -> None:
+    for workflow in workflows:
+        sync_workflow_cron(workflow)
+    if settings.scheduler_leader_election:
+        scheduler_lease.renew()
+        scheduler.add_job(
+            scheduler_lease.renew,
+            IntervalTrigger(seconds=settings.scheduler_lease_seconds / 3),
+            id=LEASE_JOB_ID,
+            jobstore="system",
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+        )
+        if settings.workflow_sync_seconds > 0:
+            # Runs in every process, not just the leader: each one routes webhooks and may take over cron.
+            scheduler.add_job(
+                sync_workflows,
+                IntervalTrigger(seconds=settings.workflow_sync_seconds),
+                id=WORKFLOW_SYNC_JOB_ID,
+                jobstore="system",
+                replace_existing=True,
+                coalesce=True,
+                max_instances=1,
+            )
     if not scheduler.running:
         scheduler.start()
 
 
+def scheduler_stats() -> dict[str, Any]:
+    return {
+        "jobs": len(scheduler.get_jobs(jobstore="default")),
+        "leaderElection": settings.scheduler_leader_election,
+        "leader": is_scheduler_leader(),
+        "lease": scheduler_lease.stats() if settings.scheduler_leader_election else None,
+    }
+
+
 def shutdown_scheduler() -> None:
     if scheduler.running:
         scheduler.shutdown()
+    if settings.scheduler_leader_election:
+        scheduler_lease.release()
+
+
+def _remove_job(job_id: str) -> None:
+    try:
+        scheduler.remove_job(job_id, jobstore="default")
+    except JobLookupError:
+        pass
@@ -1,5 +1,7 @@
 from datetime import datetime
-from pydantic import BaseModel, Field
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class NodePosition(BaseModel):
@@ -22,19 +24,57 @@ class WorkflowEdge(BaseModel):
     targetHandle: str | None = None
 
 
+class RetentionSettings(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    maxAgeDays: int | None = Field(default=None, ge=0)
+    maxCount: int | None = Field(default=None, ge=0)
+    failedMaxAgeDays: int | None = Field(default=None, ge=0)
+
+
+class WorkflowSettings(BaseModel):
+    # Unknown keys are kept so the editor can store its own preferences here.
+    model_config = ConfigDict(extra="allow")
+
+    overlap: Literal["allow", "skip", "queue", "replace"] | None = None
+    maxConcurrency: int | None = Field(default=None, ge=0)
+    persistence: Literal["full", "outputs-only", "errors-only", "none"] | None = None
+    streaming: bool | None = None
+    chunkSize: int | None = Field(default=None, ge=1)
+    traceSampleRate: float | None = Field(default=None, ge=0, le=1)
+    retention: RetentionSettings | None = None
+
+
 class WorkflowCreate(BaseModel):
     name: str
     active: bool = False
     nodes: list[WorkflowNode]
     edges: list[WorkflowEdge]
+    settings: WorkflowSettings = Field(default_factory=WorkflowSettings)
 
 
 class WorkflowResponse(WorkflowCreate):
     id: str
+    # Rows saved before settings were validated are returned as stored.
+    settings: dict = Field(default_factory=dict)
     createdAt: datetime
     updatedAt: datetime
 
 
+class WorkflowSummary(BaseModel):
+    id: str
+    name: str
+    active: bool
+    nodeCount: int
+    updatedAt: datetime
+
+
+class WorkflowSummaryPage(BaseModel):
+    items: list[WorkflowSummary]
+    nextCursor: str | None = None
+    hasMore: bool = False
+
+
 class ExecutionResponse(BaseModel):
     id: str
     workflowId: str
@@ -44,6 +84,12 @@ class ExecutionResponse(BaseModel):
     error: str | None = None
 
 
+class ExecutionPage(BaseModel):
+    items: list[ExecutionResponse]
+    nextCursor: str | None = None
+    hasMore: bool = False
+
+
 class ExecutionStepResponse(BaseModel):
     id: str
     executionId: str
@@ -56,5 +102,14 @@ class ExecutionStepResponse(BaseModel):
     error: str | None = None
 
 
+class StepPayloadResponse(BaseModel):
+    executionId: str
+    stepId: str
+    field: str
+    offset: int
+    total: int | dict[str, int] | None = None
+    data: dict | list | None = None
+
+
 class ExecutionDetailResponse(ExecutionResponse):
     steps: list[ExecutionStepResponse]
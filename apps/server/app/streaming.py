@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+from .config import settings
+from .metrics import NODE_SECONDS
+from .nodes import Items, NodeContext
+from .persistence import StepRecord, StepRecorder
+from .plans import ExecutionPlan, PlanNode
+from .tracing import span
+
+
+def resolve_chunk_size(workflow_settings: dict[str, Any]) -> int:
+    chunk_size = int(workflow_settings.get("chunkSize") or settings.stream_chunk_size)
+    if chunk_size < 1:
+        raise ValueError("chunkSize must be at least 1")
+    return chunk_size
+
+
+def iter_chunks(items: Items, chunk_size: int) -> Iterator[Items]:
+    for index in range(0, len(items), chunk_size):
+        yield items[index : index + chunk_size]
+
+
+@dataclass
+class _NodeStream:
+    node: PlanNode
+    ctx: NodeContext = field(default_factory=NodeContext)
+    record: StepRecord | None = None
+    # Only barrier nodes (merge, single HTTP request, whole-list code) buffer input.
+    buffer: dict[str, Items] = field(default_factory=dict)
+    received: dict[str, Any] = field(default_factory=lambda: {"streamed": True, "items": 0, "chunks": 0})
+    emitted: dict[str, Any] = field(default_factory=lambda: {"streamed": True, "items": {}, "chunks": 0})
+
+
+class StreamingRun:
+    """Push chunks of items through the plan instead of materialising every node's output.
+
+    Streamable nodes run once per chunk and hand their output straight to their
+    targets, so a chunk is released as soon as every downstream node has seen it.
+    Other nodes buffer their input until all upstream nodes are exhausted, run once,
+    and re-chunk their output. Steps record item and chunk counts, not payloads.
+    """
+
+    def __init__(self, plan: ExecutionPlan, recorder: StepRecorder, chunk_size: int) -> None:
+        self.plan = plan
+        self.recorder = recorder
+        self.chunk_size = chunk_size
+        self.waiting_on = dict(plan.waiting_on)
+        self.streams = {node_id: _NodeStream(plan.nodes[node_id]) for node_id in plan.waiting_on}
+
+    def run(self, initial_items: Items) -> None:
+        triggers = sorted(
+            (node_id for node_id in self.plan.triggers if node_id in self.streams),
+            key=self.plan.position.__getitem__,
+        )
+        for node_id in triggers:
+            for chunk in iter_chunks(initial_items, self.chunk_size):
+                self._feed(node_id, "trigger", chunk)
+            self._close(node_id)
+
+    def _feed(self, node_id: str, input_key: str, items: Items) -> None:
+        stream = self.streams[node_id]
+        stream.received["items"] += len(items)
+        stream.received["chunks"] += 1
+        if not stream.node.streamable:
+            stream.buffer.setdefault(input_key, []).extend(items)
+            return
+        self._emit(node_id, self._call(stream, items, [items]))
+
+    def _close(self, node_id: str) -> None:
+        stream = self.streams[node_id]
+        node = stream.node
+        if not node.streamable:
+            inputs = [stream.buffer.pop(key, []) for key in node.input_keys or ["trigger"]]
+            result = self._call(stream, [item for node_input in inputs for item in node_input], inputs)
+            del inputs
+            outputs = result.get("outputs")
+            if outputs:
+                for handle, handle_items in outputs.items():
+                    for chunk in iter_chunks(handle_items, self.chunk_size):
+                        self._emit(node_id, {"outputs": {handle: chunk}})
+            else:
+                for chunk in iter_chunks(result.get("default", []), self.chunk_size):
+                    self._emit(node_id, {"default": chunk})
+            del result, outputs
+        if stream.record is None:
+            stream.record = self.recorder.start(node_id, stream.received)
+        self.recorder.succeed(stream.record, stream.emitted, stream.ctx.logs)
+        self.recorder.maybe_flush()
+
+        for edge in node.outgoing:
+            target = edge["target"]
+            self.waiting_on[target] -= 1
+            if self.waiting_on[target] == 0:
+                self._close(target)
+
+    def _call(self, stream: _NodeStream, items: Items, inputs: list[Items]) -> dict[str, Any]:
+        node = stream.node
+        if not node.handler:
+            raise RuntimeError(f"No handler for node type {node.type}")
+        if stream.record is None:
+            stream.record = self.recorder.start(node.id, stream.received)
+        stream.ctx.inputs = inputs
+        started = time.perf_counter()
+        try:
+            with span(node.id, "node", type=node.type, items=len(items)):
+                return node.handler(node.params, items, stream.ctx)
+        except Exception as exc:
+            self.recorder.fail(stream.record, str(exc))
+            raise
+        finally:
+            NODE_SECONDS.observe(time.perf_counter() - started, node.type)
+
+    def _emit(self, node_id: str, result: dict[str, Any]) -> None:
+        outputs = result.get("outputs")
+        output_default = result.get("default", [])
+        counts = self.streams[node_id].emitted
+        counts["chunks"] += 1
+        for handle, handle_items in (outputs or {"default": output_default}).items():
+            counts["items"][handle] = counts["items"].get(handle, 0) + len(handle_items)
+
+        for edge in self.plan.nodes[node_id].outgoing:
+            if outputs:
+                items_for_edge = outputs.get(edge.get("sourceHandle") or "default", [])
+            else:
+                items_for_edge = output_default
+            if items_for_edge:
+                self._feed(edge["target"], edge.get("targetHandle") or node_id, items_for_edge)
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import contextvars
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+_current_trace: contextvars.ContextVar[ExecutionTrace | None] = contextvars.ContextVar(
+    "trace", default=None
+)
+_current_span: contextvars.ContextVar[int] = contextvars.ContextVar("span", default=0)
+_export_lock = threading.Lock()
+
+
+def should_sample(workflow_settings: dict[str, Any]) -> bool:
+    rate = workflow_settings.get("traceSampleRate")
+    rate = settings.trace_sample_rate if rate is None else float(rate)
+    return rate > 0 and (rate >= 1 or random.random() < rate)
+
+
+class ExecutionTrace:
+    """Spans of one execution, kept as [id, parent, name, category, start_ns, end_ns, tid, args]."""
+
+    def __init__(self, execution_id: str, workflow_id: str, max_spans: int) -> None:
+        self.execution_id = execution_id
+        self.workflow_id = workflow_id
+        self.max_spans = max_spans
+        self.spans: list[list[Any]] = []
+        self.dropped = 0
+        self._ids = itertools.count(1)
+        self._wall_offset_ns = time.time_ns() - time.perf_counter_ns()
+        self.root_id = self.next_id()
+        self.started_ns = time.perf_counter_ns()
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    def append(
+        self,
+        span_id: int,
+        parent: int,
+        name: str,
+        category: str,
+        start_ns: int,
+        end_ns: int,
+        args: dict[str, Any],
+    ) -> None:
+        if len(self.spans) >= self.max_spans:
+            self.dropped += 1
+            return
+        self.spans.append([span_id, parent, name, category, start_ns, end_ns, threading.get_ident(), args])
+
+    def finish(self, **args: Any) -> None:
+        self.append(self.root_id, 0, "execution", "execution", self.started_ns, time.perf_counter_ns(), args)
+
+    def to_chrome(self) -> dict[str, Any]:
+        threads: dict[int, int] = {}
+        events = []
+        origin = min((span[4] for span in self.spans), default=0)
+        for span_id, parent, name, category, start_ns, end_ns, tid, args in sorted(
+            self.spans, key=lambda span: span[4]
+        ):
+            events.append(
+                {
+                    "name": name,
+                    "cat": category,
+                    "ph": "X",
+                    "ts": (start_ns - origin) / 1000,
+                    "dur": (end_ns - start_ns) / 1000,
+                    "pid": 1,
+                    "tid": threads.setdefault(tid, len(threads) + 1),
+                    "args": {**args, "spanId": span_id, "parentId": parent},
+                }
+            )
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "executionId": self.execution_id,
+                "workflowId": self.workflow_id,
+                "startedAtUnixNano": origin + self._wall_offset_ns,
+                "droppedSpans": self.dropped,
+            },
+        }
+
+    def to_otlp(self) -> dict[str, Any]:
+        trace_id = self.execution_id.replace("-", "")[:32].ljust(32, "0")
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [_attribute("service.name", "automation-server")]},
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "app.tracing"},
+                            "spans": [self._otlp_span(trace_id, span) for span in self.spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def _otlp_span(self, trace_id: str, span: list[Any]) -> dict[str, Any]:
+        span_id, parent, name, category, start_ns, end_ns, _tid, args = span
+        return {
+            "traceId": trace_id,
+            "spanId": f"{span_id:016x}",
+            "parentSpanId": f"{parent:016x}" if parent else "",
+            "name": name,
+            "kind": 1,
+            "startTimeUnixNano": str(start_ns + self._wall_offset_ns),
+            "endTimeUnixNano": str(end_ns + self._wall_offset_ns),
+            "attributes": [
+                _attribute("category", category),
+                _attribute("workflow.id", self.workflow_id),
+                *(_attribute(key, value) for key, value in args.items()),
+            ],
+        }
+
+
+def _attribute(key: str, value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class _Span:
+    __slots__ = ("trace", "name", "category", "args", "start_ns", "span_id", "token")
+
+    def __init__(self, trace: ExecutionTrace, name: str, category: str, args: dict[str, Any]) -> None:
+        self.trace = trace
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self) -> _Span:
+        # The id is reserved up front so child spans can point at it before this one ends.
+        self.span_id = self.trace.next_id()
+        self.token = _current_span.set(self.span_id)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, _tb: Any) -> None:
+        end_ns = time.perf_counter_ns()
+        _current_span.reset(self.token)
+        if exc is not None:
+            self.args["error"] = str(exc)
+        self.trace.append(
+            self.span_id, _current_span.get(), self.name, self.category, self.start_ns, end_ns, self.args
+        )
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> _NullSpan:
+        return self
+
+    def __exit__(self, *_args: Any) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, category: str, **args: Any) -> _Span | _NullSpan:
+    trace = _current_trace.get()
+    if trace is None:
+        return _NULL_SPAN
+    return _Span(trace, name, category, args)
+
+
+def current_trace() -> ExecutionTrace | None:
+    return _current_trace.get()
+
+
+def record_span(name: str, category: str, start_ns: int, end_ns: int, **args: Any) -> None:
+    """Add an already finished span (perf_counter_ns clock) under the current span."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.append(trace.next_id(), _current_span.get(), name, category, start_ns, end_ns, args)
+
+
+def activate(trace: ExecutionTrace | None) -> tuple[contextvars.Token, contextvars.Token]:
+    return _current_trace.set(trace), _current_span.set(trace.root_id if trace else 0)
+
+
+def deactivate(tokens: tuple[contextvars.Token, contextvars.Token]) -> None:
+    _current_trace.reset(tokens[0])
+    _current_span.reset(tokens[1])
+
+
+def bind(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Carry the active trace into worker threads, which do not inherit context variables."""
+    if _current_trace.get() is None:
+        return fn
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+
+def export_otlp(trace: ExecutionTrace) -> None:
+    if not settings.trace_otlp_file:
+        return
+    line = json.dumps(trace.to_otlp(), separators=(",", ":"))
+    try:
+        with _export_lock, open(settings.trace_otlp_file, "a", encoding="utf-8") as handle:
+            handle.write(line + "\n")
+    except OSError:
+        logger.warning("Could not append trace to %s", settings.trace_otlp_file, exc_info=True)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from .models import WebhookEndpoint, Workflow
+
+
+@dataclass(frozen=True)
+class WebhookRoute:
+    workflow_id: str
+    node_id: str
+    method: str
+    path: str
+    segments: tuple[str, ...]
+
+    @property
+    def is_pattern(self) -> bool:
+        return any(_is_param(segment) for segment in self.segments)
+
+    def match(self, segments: list[str]) -> dict[str, str] | None:
+        params: dict[str, str] = {}
+        for expected, actual in zip(self.segments, segments):
+            if _is_param(expected):
+                params[expected[1:-1]] = actual
+            elif expected != actual:
+                return None
+        return params
+
+
+def _is_param(segment: str) -> bool:
+    return len(segment) > 2 and segment.startswith("{") and segment.endswith("}")
+
+
+def normalize_path(path: str) -> str:
+    return path.strip("/")
+
+
+class WebhookRouter:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._static: dict[tuple[str, str], list[WebhookRoute]] = {}
+        self._patterns: dict[tuple[str, int], list[WebhookRoute]] = {}
+        self._routes_by_workflow: dict[str, list[WebhookRoute]] = {}
+        self._active: dict[str, bool] = {}
+
+    def load(self, db: Session) -> None:
+        rows = (
+            db.query(WebhookEndpoint, Workflow.active)
+            .join(Workflow, Workflow.id == WebhookEndpoint.workflow_id)
+            .all()
+        )
+        endpoints: dict[str, list[WebhookEndpoint]] = {}
+        active: dict[str, bool] = {}
+        for endpoint, workflow_active in rows:
+            endpoints.setdefault(endpoint.workflow_id, []).append(endpoint)
+            active[endpoint.workflow_id] = bool(workflow_active)
+        # Build the new tables aside and swap them in at once, so live webhooks never see
+        # a half-loaded router.
+        loaded = WebhookRouter()
+        for workflow_id, workflow_endpoints in endpoints.items():
+            loaded.set_workflow(
+                workflow_id,
+                active[workflow_id],
+                [(endpoint.method, endpoint.path, endpoint.node_id) for endpoint in workflow_endpoints],
+            )
+        with self._lock:
+            self._static, self._patterns = loaded._static, loaded._patterns
+            self._routes_by_workflow, self._active = loaded._routes_by_workflow, loaded._active
+
+    def set_workflow(self, workflow_id: str, active: bool, endpoints: list[tuple[str, str, str]]) -> None:
+        routes = []
+        for method, path, node_id in endpoints:
+            path = normalize_path(path)
+            routes.append(
+                WebhookRoute(
+                    workflow_id=workflow_id,
+                    node_id=node_id,
+                    method=method.upper(),
+                    path=path,
+                    segments=tuple(path.split("/")),
+                )
+            )
+        with self._lock:
+            self._remove_locked(workflow_id)
+            self._active[workflow_id] = active
+            self._routes_by_workflow[workflow_id] = routes
+            for route in routes:
+                table, key = self._slot(route)
+                table.setdefault(key, []).append(route)
+
+    def remove_workflow(self, workflow_id: str) -> None:
+        with self._lock:
+            self._remove_locked(workflow_id)
+
+    def resolve(self, method: str, path: str) -> tuple[WebhookRoute, dict[str, str]] | None:
+        method = method.upper()
+        path = normalize_path(path)
+        with self._lock:
+            for route in self._static.get((method, path), []):
+                if self._active.get(route.workflow_id):
+                    return route, {}
+            segments = path.split("/")
+            for route in self._patterns.get((method, len(segments)), []):
+                if not self._active.get(route.workflow_id):
+                    continue
+                params = route.match(segments)
+                if params is not None:
+                    return route, params
+        return None
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "static": sum(len(routes) for routes in self._static.values()),
+                "patterns": sum(len(routes) for routes in self._patterns.values()),
+                "workflows": len(self._routes_by_workflow),
+            }
+
+    def _remove_locked(self, workflow_id: str) -> None:
+        self._active.pop(workflow_id, None)
+        for route in self._routes_by_workflow.pop(workflow_id, []):
+            table, key = self._slot(route)
+            bucket = [other for other in table.get(key, []) if other.workflow_id != workflow_id]
+            if bucket:
+                table[key] = bucket
+            else:
+                table.pop(key, None)
+
+    def _slot(self, route: WebhookRoute) -> tuple[dict[Any, list[WebhookRoute]], Any]:
+        if route.is_pattern:
+            return self._patterns, (route.method, len(route.segments))
+        return self._static, (route.method, route.path)
+
+
+webhook_router = WebhookRouter()
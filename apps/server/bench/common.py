@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """Local upstream for httpRequest nodes: ?sleep=<seconds> delays, ?items=<n> sizes the body."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    wbufsize = 64 * 1024
+
+    def do_GET(self) -> None:  # noqa: N802
+        self._respond()
+
+    def do_POST(self) -> None:  # noqa: N802
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self._respond()
+
+    def _respond(self) -> None:
+        query = parse_qs(urlparse(self.path).query)
+        if "sleep" in query:
+            time.sleep(float(query["sleep"][0]))
+        items = int(query.get("items", ["0"])[0])
+        payload = [{"index": index} for index in range(items)] if items else {"ok": True}
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args: object) -> None:
+        pass
+
+
+def start_stand_in_server() -> tuple[ThreadingHTTPServer, str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def summarize(timings: list[float]) -> dict[str, float]:
+    ordered = sorted(timings)
+    return {
+        "p50Ms": round(statistics.median(ordered), 3),
+        "p99Ms": round(ordered[max(0, int(len(ordered) * 0.99) - 1)], 3),
+        "meanMs": round(statistics.fmean(ordered), 3),
+    }
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+import httpx
+
+from app.http_pool import HttpClientPool
+from bench.common import start_stand_in_server, summarize
+
+
+def _measure(fn, requests: int) -> list[float]:
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def run(requests: int) -> dict[str, object]:
+    server, url = start_stand_in_server()
+    try:
+        def fresh_client() -> None:
+            with httpx.Client() as client:
+                client.get(url)
+
+        pool = HttpClientPool(20, 10, 30.0, False, 5.0, 16)
+        fresh = _measure(fresh_client, requests)
+        pooled = _measure(lambda: pool.request("GET", url), requests)
+        stats = pool.stats()
+        pool.close()
+    finally:
+        server.shutdown()
+    return {
+        "requests": requests,
+        "freshClient": summarize(fresh),
+        "pooledClient": summarize(pooled),
+        "reuseRatio": stats["reuseRatio"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare per-call httpx clients with the shared pool.")
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+    print(json.dumps(run(args.requests), indent=2))
+
+
+if __name__ == "__main__":
+    main()
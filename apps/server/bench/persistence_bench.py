@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+from app.config import settings  # noqa: E402
+from app.db import SessionLocal, upgrade_schema  # noqa: E402
+from app.persistence import PERSISTENCE_LEVELS  # noqa: E402
+from app.plans import compile_plan  # noqa: E402
+from app.runtime import execute_workflow  # noqa: E402
+
+
+def linear_workflow(length: int, persistence: str) -> dict:
+    nodes = [{"id": "trigger", "type": "manualTrigger", "data": {"params": {}}}]
+    edges = []
+    for index in range(length):
+        nodes.append({"id": f"set-{index}", "type": "set", "data": {"params": {"fields": {"step": index}}}})
+        edges.append({"id": f"e{index}", "source": nodes[-2]["id"], "target": nodes[-1]["id"]})
+    return {
+        "id": f"bench-{persistence}",
+        "name": "bench",
+        "active": False,
+        "nodes": nodes,
+        "edges": edges,
+        "settings": {"persistence": persistence},
+    }
+
+
+def run(executions: int, length: int, flush_interval_ms: int) -> dict[str, object]:
+    upgrade_schema()
+    settings.step_flush_interval_ms = flush_interval_ms
+    results = {}
+    for level in PERSISTENCE_LEVELS:
+        plan = compile_plan(linear_workflow(length, level))
+        started = time.perf_counter()
+        with SessionLocal() as db:
+            for _ in range(executions):
+                execute_workflow(db, plan, [{"value": 1}])
+        elapsed = time.perf_counter() - started
+        results[level] = {"executionsPerSecond": round(executions / elapsed, 1)}
+    return {"executions": executions, "nodes": length, "flushIntervalMs": flush_interval_ms, "levels": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure execution throughput per step persistence level.")
+    parser.add_argument("--executions", type=int, default=100)
+    parser.add_argument("--nodes", type=int, default=20)
+    parser.add_argument("--flush-interval-ms", type=int, default=settings.step_flush_interval_ms)
+    args = parser.parse_args()
+    print(json.dumps(run(args.executions, args.nodes, args.flush_interval_ms), indent=2))
+
+
+if __name__ == "__main__":
+    main()
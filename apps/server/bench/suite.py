@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.db import SessionLocal, engine, upgrade_schema  # noqa: E402
+from app.main import app  # noqa: E402
+from app.plans import ExecutionPlan, compile_plan  # noqa: E402
+from app.runtime import execute_workflow  # noqa: E402
+from app.sandbox import sandbox_pool  # noqa: E402
+from bench import workflows  # noqa: E402
+from bench.common import start_stand_in_server, summarize  # noqa: E402
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+
+# Metrics compared against the baseline, and whether a larger value is better. p99 is
+# reported but not compared: with a few dozen iterations it is effectively the maximum.
+COMPARED_METRICS = {
+    "p50Ms": False,
+    "executionsPerSecond": True,
+    "dbWritesPerExecution": False,
+    "peakMemoryKiB": False,
+}
+
+
+class WriteCounter:
+    """Count INSERT/UPDATE/DELETE statements and commits issued through the engine."""
+
+    def __init__(self) -> None:
+        self.writes = 0
+        self.commits = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine, "commit", self._on_commit)
+
+    def reset(self) -> None:
+        self.writes = 0
+        self.commits = 0
+
+    def _on_execute(self, _conn: Any, _cursor: Any, statement: str, *_args: Any) -> None:
+        if statement.lstrip()[:6].upper() in ("INSERT", "UPDATE", "DELETE"):
+            self.writes += 1
+
+    def _on_commit(self, _conn: Any) -> None:
+        self.commits += 1
+
+
+@dataclass
+class EngineScenario:
+    name: str
+    build: Callable[[str], dict[str, Any]]
+    item_count: int = 1
+
+
+def engine_scenarios() -> list[EngineScenario]:
+    return [
+        EngineScenario("chain-20", lambda _url: workflows.linear_chain(20)),
+        EngineScenario("fanout-16", lambda _url: workflows.fan_out(16)),
+        EngineScenario("diamonds-8", lambda _url: workflows.diamonds(8)),
+        EngineScenario("items-20k", lambda _url: workflows.item_pipeline(persistence="none"), 20_000),
+        EngineScenario(
+            "items-20k-streaming",
+            lambda _url: workflows.item_pipeline(persistence="none", streaming=True),
+            20_000,
+        ),
+        EngineScenario("http", lambda url: workflows.http_chain(url)),
+        EngineScenario("code", lambda _url: workflows.code_node(), 100),
+    ]
+
+
+def _execute(plan: ExecutionPlan, initial_items: list[dict[str, Any]]) -> None:
+    with SessionLocal() as db:
+        execute_workflow(db, plan, initial_items)
+
+
+def _peak_memory_kib(fn: Callable[[], None]) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        tracemalloc.stop()
+
+
+def run_engine_scenario(scenario: EngineScenario, iterations: int, url: str, counter: WriteCounter) -> dict[str, Any]:
+    plan = compile_plan(scenario.build(url))
+    if plan.error:
+        raise RuntimeError(f"{scenario.name}: {plan.error}")
+    initial_items = workflows.items(scenario.item_count)
+    _execute(plan, initial_items)
+
+    counter.reset()
+    timings = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        run_started = time.perf_counter()
+        _execute(plan, initial_items)
+        timings.append((time.perf_counter() - run_started) * 1000)
+    elapsed = time.perf_counter() - started
+    writes, commits = counter.writes, counter.commits
+
+    # Traced separately: tracemalloc slows allocation-heavy runs considerably.
+    peak = _peak_memory_kib(lambda: _execute(plan, initial_items))
+    return {
+        "iterations": iterations,
+        **summarize(timings),
+        "executionsPerSecond": round(iterations / elapsed, 1),
+        "dbWritesPerExecution": round(writes / iterations, 2),
+        "commitsPerExecution": round(commits / iterations, 2),
+        "peakMemoryKiB": peak,
+    }
+
+
+def run_webhook_scenario(iterations: int, counter: WriteCounter) -> dict[str, Any]:
+    with TestClient(app) as client:
+        response = client.post("/api/workflows", json=workflows.webhook_chain("bench/hook"))
+        response.raise_for_status()
+        client.post("/api/webhooks/bench/hook", json={"warmup": True})
+        _wait_for_idle(client)
+
+        counter.reset()
+        timings = []
+        started = time.perf_counter()
+        for index in range(iterations):
+            request_started = time.perf_counter()
+            accepted = client.post("/api/webhooks/bench/hook", json={"index": index})
+            timings.append((time.perf_counter() - request_started) * 1000)
+            if accepted.status_code == 429:
+                _wait_for_idle(client)
+            else:
+                accepted.raise_for_status()
+        _wait_for_idle(client)
+        elapsed = time.perf_counter() - started
+        writes, commits = counter.writes, counter.commits
+    return {
+        "iterations": iterations,
+        **summarize(timings),
+        "executionsPerSecond": round(iterations / elapsed, 1),
+        "dbWritesPerExecution": round(writes / iterations, 2),
+        "commitsPerExecution": round(commits / iterations, 2),
+    }
+
+
+def _wait_for_idle(client: TestClient, timeout: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        queue = client.get("/api/stats").json()["queue"]
+        if not queue["queued"] and not queue["running"]:
+            return
+        time.sleep(0.01)
+    raise TimeoutError("Executions did not finish")
+
+
+def run(iterations: int, selected: set[str] | None) -> dict[str, Any]:
+    upgrade_schema()
+    counter = WriteCounter()
+    server, url = start_stand_in_server()
+    sandbox_pool.start()
+    results: dict[str, Any] = {}
+    try:
+        for scenario in engine_scenarios():
+            if selected and scenario.name not in selected:
+                continue
+            results[scenario.name] = run_engine_scenario(scenario, iterations, url, counter)
+        if not selected or "api-webhook" in selected:
+            results["api-webhook"] = run_webhook_scenario(iterations * 5, counter)
+    finally:
+        server.shutdown()
+        sandbox_pool.close()
+    return {"python": sys.version.split()[0], "scenarios": results}
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    regressions = []
+    for name, metrics in current["scenarios"].items():
+        reference = baseline.get("scenarios", {}).get(name)
+        if not reference:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            if metric not in metrics or not reference.get(metric):
+                continue
+            change = (metrics[metric] - reference[metric]) / reference[metric]
+            worse = -change if higher_is_better else change
+            flag = "REGRESSION" if worse > tolerance else ""
+            print(f"{name:22} {metric:22} {reference[metric]:>12} -> {metrics[metric]:>12} {change:+8.1%} {flag}")
+            if flag:
+                regressions.append(f"{name}.{metric}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the engine, persistence and HTTP benchmark suite.")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--scenario", action="append", help="Run only the named scenario (repeatable).")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Overwrite the baseline with this run.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression.")
+    parser.add_argument("--output", type=Path, help="Also write the results to this file.")
+    args = parser.parse_args()
+
+    results = run(args.iterations, set(args.scenario) if args.scenario else None)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        return
+    if args.baseline.exists():
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
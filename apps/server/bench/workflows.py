@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from typing import Any
+
+
+def _node(node_id: str, node_type: str, **params: Any) -> dict[str, Any]:
+    return {"id": node_id, "type": node_type, "position": {"x": 0, "y": 0}, "data": {"params": params}}
+
+
+def _edge(source: str, target: str, source_handle: str | None = None) -> dict[str, Any]:
+    edge = {"id": f"{source}->{target}", "source": source, "target": target}
+    if source_handle:
+        edge["sourceHandle"] = source_handle
+    return edge
+
+
+def _workflow(name: str, nodes: list[dict], edges: list[dict], **settings: Any) -> dict[str, Any]:
+    return {"id": f"bench-{name}", "name": name, "active": True, "nodes": nodes, "edges": edges, "settings": settings}
+
+
+def linear_chain(length: int, **settings: Any) -> dict[str, Any]:
+    nodes = [_node("trigger", "manualTrigger")]
+    edges = []
+    for index in range(length):
+        nodes.append(_node(f"set-{index}", "set", fields={"step": index}))
+        edges.append(_edge(nodes[-2]["id"], nodes[-1]["id"]))
+    return _workflow(f"chain-{length}", nodes, edges, **settings)
+
+
+def fan_out(width: int, **settings: Any) -> dict[str, Any]:
+    nodes = [_node("trigger", "manualTrigger"), _node("merge", "merge")]
+    edges = []
+    for index in range(width):
+        nodes.append(_node(f"branch-{index}", "set", fields={"branch": index}))
+        edges += [_edge("trigger", f"branch-{index}"), _edge(f"branch-{index}", "merge")]
+    return _workflow(f"fanout-{width}", nodes, edges, **settings)
+
+
+def diamonds(depth: int, **settings: Any) -> dict[str, Any]:
+    nodes = [_node("trigger", "manualTrigger")]
+    edges = []
+    previous = "trigger"
+    for index in range(depth):
+        split, left, right, join = (f"{part}-{index}" for part in ("split", "left", "right", "join"))
+        nodes += [
+            _node(split, "if", field="value", operator="gte", value=0),
+            _node(left, "set", fields={"side": "left"}),
+            _node(right, "set", fields={"side": "right"}),
+            _node(join, "merge", mode="append"),
+        ]
+        edges += [
+            _edge(previous, split),
+            _edge(split, left, "true"),
+            _edge(split, right, "false"),
+            _edge(left, join),
+            _edge(right, join),
+        ]
+        previous = join
+    return _workflow(f"diamonds-{depth}", nodes, edges, **settings)
+
+
+def item_pipeline(**settings: Any) -> dict[str, Any]:
+    nodes = [
+        _node("trigger", "manualTrigger"),
+        _node("tag", "set", fields={"meta.source": "bench"}),
+        _node("filter", "if", field="value", operator="lt", value=50),
+        _node("low", "set", fields={"bucket": "low"}),
+        _node("high", "set", fields={"bucket": "high"}),
+    ]
+    edges = [
+        _edge("trigger", "tag"),
+        _edge("tag", "filter"),
+        _edge("filter", "low", "true"),
+        _edge("filter", "high", "false"),
+    ]
+    name = "items-streaming" if settings.get("streaming") else "items"
+    return _workflow(name, nodes, edges, **settings)
+
+
+def http_chain(url: str, **settings: Any) -> dict[str, Any]:
+    nodes = [
+        _node("trigger", "manualTrigger"),
+        _node("fetch", "httpRequest", url=url),
+        _node("tag", "set", fields={"fetched": True}),
+    ]
+    return _workflow("http", nodes, [_edge("trigger", "fetch"), _edge("fetch", "tag")], **settings)
+
+
+def code_node(**settings: Any) -> dict[str, Any]:
+    nodes = [
+        _node("trigger", "manualTrigger"),
+        _node("code", "code", code="lambda items: [{**item, 'double': item['value'] * 2} for item in items]"),
+    ]
+    return _workflow("code", nodes, [_edge("trigger", "code")], **settings)
+
+
+def webhook_chain(path: str, **settings: Any) -> dict[str, Any]:
+    nodes = [
+        _node("trigger", "webhookTrigger", path=path, method="POST"),
+        _node("tag", "set", fields={"received": True}),
+    ]
+    return _workflow("webhook", nodes, [_edge("trigger", "tag")], **settings)
+
+
+def items(count: int) -> list[dict[str, Any]]:
+    return [{"value": index % 100} for index in range(count)]
@@ -3,7 +3,8 @@ const state = {
   nodes: [],
   edges: [],
   nodeDefinitions: [],
-  selectedNodeId: null
+  selectedNodeId: null,
+  selectedExecutionId: null
 };
 
 const api = {
@@ -12,7 +13,11 @@ const api = {
     return response.json();
   },
   async listWorkflows() {
-    const response = await fetch('/api/workflows');
+    const response = await fetch('/api/workflows?view=summary');
+    return response.json();
+  },
+  async getWorkflow(id) {
+    const response = await fetch(`/api/workflows/${id}`);
     return response.json();
   },
   async createWorkflow(payload) {
@@ -34,12 +39,14 @@ const api = {
   async runWorkflow(id) {
     await fetch(`/api/workflows/${id}/run`, { method: 'POST' });
   },
-  async listExecutions(workflowId) {
-    const response = await fetch(`/api/executions?workflowId=${workflowId}`);
+  async listExecutions(workflowId, after) {
+    const params = new URLSearchParams({ workflowId, limit: '50' });
+    if (after) params.set('after', after);
+    const response = await fetch(`/api/executions?${params}`);
     return response.json();
   },
   async getExecution(id) {
-    const response = await fetch(`/api/executions/${id}`);
+    const response = await fetch(`/api/executions/${id}?payloads=output`);
     return response.json();
   }
 };
@@ -289,7 +296,8 @@ async function saveWorkflow() {
     name: elements.workflowName.value,
     active: elements.activeToggle.checked,
     nodes: state.nodes,
-    edges: state.edges
+    edges: state.edges,
+    settings: state.workflow.settings || {}
   };
   const updated = await api.updateWorkflow(state.workflow.id, payload);
   state.workflow = updated;
@@ -303,7 +311,7 @@ async function runWorkflow() {
 
 async function loadExecutions() {
   if (!state.workflow) return;
-  const executions = await api.listExecutions(state.workflow.id);
+  const { items: executions } = await api.listExecutions(state.workflow.id);
   elements.executionsList.innerHTML = '';
   executions.forEach((execution) => {
     const li = document.createElement('li');
@@ -311,15 +319,28 @@ async function loadExecutions() {
     btn.innerHTML = `<strong>${execution.status}</strong><span>${new Date(
       execution.startedAt
     ).toLocaleString()}</span>`;
-    btn.addEventListener('click', async () => {
-      const detail = await api.getExecution(execution.id);
-      renderExecutionDetail(detail);
-    });
+    btn.addEventListener('click', () => showExecution(execution.id));
     li.appendChild(btn);
     elements.executionsList.appendChild(li);
   });
 }
 
+async function showExecution(id) {
+  state.selectedExecutionId = id;
+  renderExecutionDetail(await api.getExecution(id));
+}
+
+function watchExecutions() {
+  // Pushes replace polling: the list is reloaded only when an execution is queued or finishes.
+  const events = new EventSource(`/api/workflows/${state.workflow.id}/events`);
+  events.addEventListener('execution.queued', loadExecutions);
+  events.addEventListener('execution.finished', (message) => {
+    loadExecutions();
+    const { executionId } = JSON.parse(message.data);
+    if (executionId === state.selectedExecutionId) showExecution(executionId);
+  });
+}
+
 function renderExecutionDetail(detail) {
   elements.executionDetails.innerHTML = '';
   const title = document.createElement('h4');
@@ -340,11 +361,11 @@ async function init() {
   const nodes = await api.getNodes();
   state.nodeDefinitions = nodes.nodes;
 
-  const workflows = await api.listWorkflows();
+  const { items: workflows } = await api.listWorkflows();
   if (workflows.length) {
-    state.workflow = workflows[0];
-    state.nodes = workflows[0].nodes;
-    state.edges = workflows[0].edges;
+    state.workflow = await api.getWorkflow(workflows[0].id);
+    state.nodes = state.workflow.nodes;
+    state.edges = state.workflow.edges;
   } else {
     state.workflow = await api.createWorkflow(defaultWorkflow());
     state.nodes = state.workflow.nodes;
@@ -358,7 +379,7 @@ async function init() {
   renderCanvas();
   renderSettings();
   await loadExecutions();
-  setInterval(loadExecutions, 5000);
+  watchExecutions();
 }
 
 function setupEvents() {
@@ -0,0 +1,14 @@
+import os
+import tempfile
+
+# Settings are read at import time, so point the app at a scratch database first.
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db")
+
+import pytest  # noqa: E402
+
+from app.db import upgrade_schema  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema() -> None:
+    upgrade_schema()
@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta
+
+from app.blobs import encode_payload, store_payloads
+from app.db import SessionLocal
+from app.models import PayloadBlob
+from app.retention import BLOB_GRACE_PERIOD, _collect_orphan_blobs
+
+
+def test_reused_blob_survives_the_orphan_sweep():
+    digest, row = encode_payload([{"reused": True}])
+    with SessionLocal() as db:
+        store_payloads(db, [row])
+        db.commit()
+        db.get(PayloadBlob, digest).created_at = datetime.utcnow() - 2 * BLOB_GRACE_PERIOD
+        db.commit()
+
+        # A step still being buffered stores the same content before the sweep runs.
+        store_payloads(db, [encode_payload([{"reused": True}])[1]])
+        db.commit()
+        _collect_orphan_blobs(db, datetime.utcnow())
+        assert db.get(PayloadBlob, digest) is not None
+
+
+def test_unreferenced_old_blob_is_collected():
+    digest, row = encode_payload([{"orphan": True}])
+    row["created_at"] = datetime.utcnow() - BLOB_GRACE_PERIOD - timedelta(minutes=1)
+    with SessionLocal() as db:
+        store_payloads(db, [row])
+        db.commit()
+        assert _collect_orphan_blobs(db, datetime.utcnow()) >= 1
+        assert db.get(PayloadBlob, digest) is None
@@ -0,0 +1,53 @@
+import threading
+import time
+
+from app import dispatcher as dispatcher_module
+from app.db import SessionLocal
+from app.dispatcher import ExecutionDispatcher
+from app.governor import AdmissionController
+from app.models import Execution
+from app.plans import compile_plan
+
+
+def make_plan(workflow_id: str = "wf", **settings):
+    return compile_plan(
+        {"id": workflow_id, "name": workflow_id, "active": True, "nodes": [], "edges": [], "settings": settings}
+    )
+
+
+def test_instantly_completing_runs_do_not_deadlock(monkeypatch):
+    monkeypatch.setattr(dispatcher_module, "_run_execution", lambda *args: None)
+    dispatcher = ExecutionDispatcher("thread", 1, AdmissionController(1, 0, 100))
+    submitted: list[str] = []
+
+    def submit_all() -> None:
+        for _ in range(20):
+            submitted.append(dispatcher.submit(make_plan(), []))
+
+    thread = threading.Thread(target=submit_all, daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+    assert len(submitted) == 20
+    dispatcher.shutdown()
+    assert dispatcher.stats()["completed"] == 20
+
+
+def test_shutdown_gives_up_on_stuck_runs(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(dispatcher_module, "_run_execution", lambda *args: release.wait(10))
+    monkeypatch.setattr(dispatcher_module.settings, "executor_shutdown_timeout", 0.2)
+    dispatcher = ExecutionDispatcher("thread", 1, AdmissionController(1, 0, 100))
+    try:
+        execution_ids = [dispatcher.submit(make_plan("stuck"), []) for _ in range(2)]
+        started = time.monotonic()
+        dispatcher.shutdown()
+        assert time.monotonic() - started < 5
+        with SessionLocal() as db:
+            rows = db.query(Execution).filter(Execution.id.in_(execution_ids)).all()
+            assert {row.status for row in rows} == {"cancelled"}
+            assert {row.error for row in rows} == {
+                "Server shut down before the run started",
+                "Server shut down before the run finished",
+            }
+    finally:
+        release.set()
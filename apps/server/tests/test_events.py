@@ -0,0 +1,33 @@
+import threading
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.db import SessionLocal
+from app.main import app
+from app.models import Execution
+
+
+def finish_elsewhere(execution_id: str) -> None:
+    # The worker that ran it publishes on its own bus; only the row changes here.
+    with SessionLocal() as db:
+        execution = db.get(Execution, execution_id)
+        execution.status, execution.finished_at = "success", datetime.utcnow()
+        db.commit()
+
+
+def test_stream_closes_when_another_process_finishes_the_run(monkeypatch):
+    monkeypatch.setattr(settings, "event_keepalive_seconds", 0.1)
+    with SessionLocal() as db:
+        db.add(Execution(id="elsewhere", workflow_id="wf", status="running", started_at=datetime.utcnow()))
+        db.commit()
+    timer = threading.Timer(0.3, finish_elsewhere, args=["elsewhere"])
+    timer.start()
+    with TestClient(app) as client:
+        response = client.get("/api/executions/elsewhere/events", timeout=10)
+    timer.join()
+    lines = response.text.splitlines()
+    assert ": keepalive" in lines
+    assert "event: execution.finished" in lines
+    assert any(line.startswith("data: ") and '"status":"success"' in line for line in lines)
@@ -0,0 +1,30 @@
+from fastapi.testclient import TestClient
+
+from app import plans
+from app.main import app
+from app.plans import plan_cache
+
+WORKFLOW = {
+    "name": "plans",
+    "nodes": [{"id": "t", "type": "manualTrigger", "position": {"x": 0, "y": 0}}],
+    "edges": [],
+}
+
+
+def test_invalidate_during_load_is_not_undone(monkeypatch):
+    with TestClient(app) as client:
+        workflow_id = client.post("/api/workflows", json=WORKFLOW).json()["id"]
+    compile_plan = plans.compile_plan
+
+    def compile_then_race(workflow):
+        # An update commits and invalidates after get() has read the old row.
+        plan_cache.invalidate(workflow["id"])
+        return compile_plan(workflow)
+
+    monkeypatch.setattr(plans, "compile_plan", compile_then_race)
+    assert plan_cache.get(workflow_id) is not None
+    assert plan_cache.cached(workflow_id) is None
+
+    monkeypatch.setattr(plans, "compile_plan", compile_plan)
+    assert plan_cache.get(workflow_id) is not None
+    assert plan_cache.cached(workflow_id) is not None
@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+
+from app.sandbox import SandboxPool
+
+SPIN = "lambda items: max(range(10 ** 10))"
+
+
+def run_in_threads(pool: SandboxPool, count: int) -> list:
+    results: list = []
+
+    def call() -> None:
+        results.append(pool.run("lambda items: items", [{"a": 1}]))
+
+    threads = [threading.Thread(target=call, daemon=True) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=20)
+    return results
+
+
+def test_recycled_workers_wake_waiting_callers():
+    pool = SandboxPool(1, timeout=5, max_tasks_per_worker=1, acquire_timeout=20)
+    try:
+        assert len(run_in_threads(pool, 3)) == 3
+        assert pool.stats()["spawned"] == 1
+    finally:
+        pool.close()
+
+
+def test_timed_out_worker_is_replaced():
+    pool = SandboxPool(2, timeout=0.5, max_tasks_per_worker=0, acquire_timeout=20)
+    pool.start()
+    try:
+        with pytest.raises(RuntimeError, match="timed out"):
+            pool.run(SPIN, [])
+        stats = pool.stats()
+        assert (stats["spawned"], stats["idle"], stats["killed"]) == (2, 2, 1)
+    finally:
+        pool.close()
+
+
+def test_acquire_gives_up_when_every_worker_is_busy():
+    pool = SandboxPool(1, timeout=2, max_tasks_per_worker=0, acquire_timeout=0.2)
+    pool.start()
+    busy = threading.Thread(target=lambda: pytest.raises(RuntimeError, pool.run, SPIN, []), daemon=True)
+    busy.start()
+    try:
+        threading.Event().wait(0.2)  # let the busy thread take the only worker
+        with pytest.raises(RuntimeError, match="pool exhausted"):
+            pool.run("lambda items: items", [])
+    finally:
+        busy.join(timeout=5)
+        pool.close()
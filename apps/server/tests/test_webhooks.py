@@ -0,0 +1,25 @@
+from app.db import SessionLocal
+from app.models import WebhookEndpoint, Workflow
+from app.webhooks import WebhookRouter
+
+
+def test_reload_never_drops_live_routes(monkeypatch):
+    with SessionLocal() as db:
+        db.add(Workflow(id="hooked", name="hooked", active=True, nodes_json="[]", edges_json="[]"))
+        db.add(WebhookEndpoint(id="hooked-1", workflow_id="hooked", path="orders/{id}", method="POST", node_id="w"))
+        db.commit()
+        router = WebhookRouter()
+        router.load(db)
+
+        seen_mid_load: list[object] = []
+        set_workflow = WebhookRouter.set_workflow
+
+        def resolve_then_set(self, *args):
+            # A webhook arriving while load() is rebuilding the tables.
+            seen_mid_load.append(router.resolve("POST", "/orders/7"))
+            set_workflow(self, *args)
+
+        monkeypatch.setattr(WebhookRouter, "set_workflow", resolve_then_set)
+        router.load(db)
+    assert seen_mid_load and None not in seen_mid_load
+    assert router.resolve("POST", "orders/7")[1] == {"id": "7"}
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db import SessionLocal
+from app.main import app
+from app.models import Workflow
+from app.plans import plan_cache
+
+WORKFLOW = {
+    "name": "settings",
+    "nodes": [{"id": "t", "type": "manualTrigger", "position": {"x": 0, "y": 0}}],
+    "edges": [],
+}
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.mark.parametrize(
+    "settings",
+    [
+        {"overlap": "sometimes"},
+        {"maxConcurrency": "lots"},
+        {"maxConcurrency": -1},
+        {"persistence": "everything"},
+        {"chunkSize": 0},
+        {"traceSampleRate": 2},
+        {"retention": {"maxAgeDays": "forever"}},
+    ],
+)
+def test_invalid_settings_are_rejected(client, settings):
+    response = client.post("/api/workflows", json={**WORKFLOW, "settings": settings})
+    assert response.status_code == 422
+
+
+def test_valid_settings_round_trip(client):
+    settings = {"overlap": "queue", "maxConcurrency": 2, "retention": {"maxCount": 10}, "editor": {"zoom": 1}}
+    response = client.post("/api/workflows", json={**WORKFLOW, "settings": settings})
+    assert response.status_code == 200
+    assert response.json()["settings"] == settings
+
+
+def test_stored_invalid_settings_fall_back_to_defaults(client):
+    workflow_id = client.post("/api/workflows", json=WORKFLOW).json()["id"]
+    with SessionLocal() as db:
+        db.get(Workflow, workflow_id).settings_json = json.dumps({"overlap": "sometimes", "maxConcurrency": "x"})
+        db.commit()
+    plan_cache.invalidate(workflow_id)
+    assert client.post(f"/api/workflows/{workflow_id}/run").status_code == 202